@@ -1,57 +1,334 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, verify_jwt_in_request
 import bcrypt
 import os
 from datetime import datetime, timedelta
 import json
 import random
+import threading
+import time
 from dotenv import load_dotenv
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Load environment variables from .env
 load_dotenv()
 
 # Import Supabase helpers
 from supabase_client import (
+    SupabaseUnavailable,
+    COALESCE_WINDOW_SECONDS,
+    MAX_ROWS,
+    start_request_budget,
+    clear_request_budget,
+    start_session_consistency,
+    clear_session_consistency,
+    consistency_token,
     get_supabase_client,
     health_check,
+    warmup as supabase_warmup,
     insert_user,
     get_user_by_id,
-    get_all_users,
+    get_user_by_email,
+    list_users,
     insert_task,
     get_tasks,
+    get_tasks_for_user,
     get_task_by_id,
-    update_task
+    get_tasks_by_ids,
+    update_task,
+    get_open_tasks_for_user,
+    get_precomputed_suggestions,
+    upsert_precomputed_suggestions,
+    delete_precomputed_suggestions,
+    insert_task_dependencies,
+    delete_task_dependency
 )
+from rollups import record_task_created, record_task_status_change, load_trends
+from recommender import WorkloadIndex
+from suggestions import score_user_tasks, build_suggestions, precompute_all, is_fresh, DEADLINE_WINDOW_DAYS
+from priority import predict_priority, next_rescore_at, rescore_due, claim_rescore_runner
+from search_index import TaskSearchIndex
+from duplicates import DuplicateIndex
+from task_store import TaskStore
+from dependencies import DependencyGraph, DependencyCycle, TASK_COLUMNS as DEPENDENCY_TASK_COLUMNS
+from singleflight import SingleFlight
+from export_tasks import build_filters, iter_csv, iter_parquet
+from import_users import import_users
+import profiling
+from profiling import timed
+from ratelimit import RateLimiter, LoadShedder
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Default JSON provider that reports serialization time to the profiler."""
+
+    def dumps(self, obj, **kwargs):
+        with profiling.timer('json'):
+            return super().dumps(obj, **kwargs)
 
 app = Flask(__name__)
+app.json = TimedJSONProvider(app)
 app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
 jwt = JWTManager(app)
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor', 'Retry-After', 'X-Consistency-Token', 'X-Profile-Id'])
+# Reverse proxies in front of the app: each appends the address it saw to X-Forwarded-For.
+# request.remote_addr becomes the entry added by the outermost trusted one, never a
+# client-supplied one further left
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', '0'))
+if TRUSTED_PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT)
+
+# ============================================================================
+# RATE LIMITING & LOAD SHEDDING
+# ============================================================================
+
+# Token cost per endpoint (default 1): routes that scan tasks, hash passwords or
+# stream exports cost more. Cost 0 is never limited.
+ROUTE_COSTS = {
+    'liveness': 0,
+    'readiness': 0,
+    'login': 5,
+    'register': 5,
+    'change_password': 5,
+    'search_tasks': 3,
+    'get_at_risk_chains': 3,
+    'get_dashboard_data': 5,
+    'get_ai_suggestions': 5,
+    'get_trends': 3,
+    'export_tasks': 20,
+    'bulk_import_users': 20,
+    'trigger_suggestions_precompute': 20
+}
+
+rate_limiter = RateLimiter()
+load_shedder = LoadShedder()
+
+# Registered before every other hook so rejected requests never reach Supabase
+@app.before_request
+def _limit_request():
+    cost = ROUTE_COSTS.get(request.endpoint, 1)
+    if request.method == 'OPTIONS' or cost == 0:
+        return
+    try:
+        # Decodes the token locally; the route still enforces it
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+    except Exception:
+        user_id = None
+    retry_after = rate_limiter.check(user_id, request.remote_addr, cost)
+    if retry_after:
+        response = jsonify({'error': 'Too many requests'})
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 429
+    if not load_shedder.acquire(cost):
+        response = jsonify({'error': 'Server is busy, please retry shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    g.shed_cost = cost
+
+@app.teardown_request
+def _release_request(exc=None):
+    cost = g.pop('shed_cost', 0)
+    if cost:
+        load_shedder.release(cost)
+
+# ============================================================================
+# REQUEST BUDGET & ERROR HANDLING
+# ============================================================================
+
+# Total time a request may spend waiting on Supabase, shared by all its calls
+REQUEST_BUDGET_SECONDS = float(os.environ.get('REQUEST_BUDGET_SECONDS', '10'))
+
+@app.before_request
+def _start_request_budget():
+    start_request_budget(REQUEST_BUDGET_SECONDS)
+    # Reads go to the replica unless the client's token shows a recent write
+    start_session_consistency(request.headers.get('X-Consistency-Token'))
+
+@app.after_request
+def _send_consistency_token(response):
+    token = consistency_token()
+    if token:
+        response.headers['X-Consistency-Token'] = token
+    return response
+
+@app.teardown_request
+def _clear_request_budget(exc=None):
+    clear_request_budget()
+    clear_session_consistency()
+
+def error_response(e):
+    """503 with Retry-After when Supabase is unavailable, 500 for anything else."""
+    if isinstance(e, SupabaseUnavailable):
+        response = jsonify({'error': 'Database temporarily unavailable', 'detail': str(e)})
+        response.headers['Retry-After'] = str(e.retry_after or 5)
+        return response, 503
+    return jsonify({'error': str(e)}), 500
+
+@app.errorhandler(SupabaseUnavailable)
+def _handle_supabase_unavailable(e):
+    return error_response(e)
+
+# ============================================================================
+# PROFILING
+# ============================================================================
+
+@app.before_request
+def _start_profiling():
+    # Admins opt in per request with X-Profile: 1; PROFILE_SAMPLE_RATE picks others at random
+    if request.headers.get('X-Profile') == '1':
+        try:
+            verify_jwt_in_request(optional=True)
+            user_id = get_jwt_identity()
+        except Exception:
+            user_id = None
+        user = get_user_by_id(user_id) if user_id else None
+        if user and user.get('role') == 'admin':
+            profiling.start(request.method, request.path, user_id, reason='header')
+            return
+    if profiling.should_sample():
+        profiling.start(request.method, request.path)
+
+@app.after_request
+def _finish_profiling(response):
+    if profiling.active():
+        response.headers['X-Profile-Id'] = profiling.finish(response.status_code)
+    return response
+
+@app.teardown_request
+def _abandon_profiling(exc=None):
+    # after_request is skipped when a route raises
+    if profiling.active():
+        profiling.finish(500)
+
+@timed('bcrypt')
+def hash_password(password):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+@timed('bcrypt')
+def check_password(password, password_hash):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
 
 # AI/ML Models (simplified for demo)
 class TaskPriorityPredictor:
     def __init__(self):
         self.model = None
     
+    @timed('predictor.priority')
     def predict_priority(self, urgency, complexity, deadline_days):
-        # Simple scoring algorithm
-        score = (urgency * 0.4) + (complexity * 0.3) + (max(0, 10 - deadline_days) * 0.3)
-        if score >= 8:
-            return "High"
-        elif score >= 5:
-            return "Medium"
-        else:
-            return "Low"
+        # Simple scoring algorithm (shared with the re-scoring job in priority.py)
+        return predict_priority(urgency, complexity, deadline_days)
 
 class CompletionTimePredictor:
+    @timed('predictor.completion_time')
     def predict_completion_time(self, task_size, complexity, employee_efficiency=1.0):
         base_hours = task_size * complexity * 2
         return base_hours / employee_efficiency
 
 priority_predictor = TaskPriorityPredictor()
 completion_predictor = CompletionTimePredictor()
+workload_index = WorkloadIndex()
+search_index = TaskSearchIndex()
+duplicate_index = DuplicateIndex()
+task_store = TaskStore()
+dependency_graph = DependencyGraph()
+# Computed results shared by concurrent identical requests (keys include the task store version)
+computed_results = SingleFlight(COALESCE_WINDOW_SECONDS)
+
+# ============================================================================
+# STARTUP WARMUP
+# ============================================================================
+
+# Readiness state filled in by warm_up(); /api/health/ready reports it.
+_warmup_state = {'complete': False, 'started_at': None, 'completed_at': None, 'attempts': 0, 'failed': [], 'steps': {}}
+_warmup_lock = threading.Lock()
+# Seconds between retries of warmup steps that failed
+WARMUP_RETRY_SECONDS = float(os.environ.get('WARMUP_RETRY_SECONDS', '10'))
+
+def _warm_models():
+    # Run each predictor once so any lazy model setup happens before traffic
+    priority_predictor.predict_priority(5, 5, 7)
+    completion_predictor.predict_completion_time(5, 5)
+    return {'ok': True}
+
+def warm_up():
+    """Connect to Supabase, preload models and prime caches, then mark the app ready.
+
+    Only steps that have not succeeded yet are run, so calling it again retries
+    the failed ones. The app is marked ready once every step has succeeded.
+    """
+    with _warmup_lock:
+        if _warmup_state['complete']:
+            return _warmup_state
+        _warmup_state['started_at'] = _warmup_state['started_at'] or datetime.now().isoformat()
+        _warmup_state['attempts'] += 1
+        steps = [
+            ('supabase', supabase_warmup),
+            ('models', _warm_models),
+            ('workload', workload_index.rebuild),
+            ('search', search_index.rebuild),
+            ('duplicates', duplicate_index.rebuild),
+            ('task_store', task_store.rebuild),
+            ('dependencies', dependency_graph.rebuild)
+        ]
+        for name, step in steps:
+            if name in _warmup_state['steps'] and name not in _warmup_state['failed']:
+                continue
+            started = time.monotonic()
+            try:
+                result = step() or {}
+            except Exception as e:
+                result = {'ok': False, 'error': str(e)}
+            result['duration_ms'] = round((time.monotonic() - started) * 1000, 2)
+            _warmup_state['steps'][name] = result
+        _warmup_state['failed'] = [name for name, result in _warmup_state['steps'].items() if result.get('ok') is False]
+        if not _warmup_state['failed']:
+            _warmup_state['completed_at'] = datetime.now().isoformat()
+            _warmup_state['complete'] = True
+        return _warmup_state
+
+def _warmup_loop():
+    while not warm_up()['complete']:
+        print(f"Warmup steps failed ({', '.join(_warmup_state['failed'])}); retrying in {WARMUP_RETRY_SECONDS:g}s")
+        time.sleep(WARMUP_RETRY_SECONDS)
+
+def start_warmup():
+    """Run warm_up() in the background, retrying failed steps, so liveness probes answer immediately."""
+    thread = threading.Thread(target=_warmup_loop, name='warmup', daemon=True)
+    thread.start()
+    return thread
+
+# Under `python app.py`, the hashing processes spawned by the user import re-run
+# this file as __mp_main__; only the server process starts background work
+IS_POOL_WORKER = __name__ == '__mp_main__'
+
+if os.environ.get('WARMUP_ON_START', '1') == '0':
+    # Nothing to wait for: indexes and caches are built on first use instead
+    _warmup_state['complete'] = True
+elif not IS_POOL_WORKER:
+    start_warmup()
+
+# ============================================================================
+# PRIORITY RE-SCORING
+# ============================================================================
+
+# Seconds between incremental re-scoring runs (0 disables; cron can run priority.py instead)
+PRIORITY_RESCORE_SECONDS = float(os.environ.get('PRIORITY_RESCORE_SECONDS', '900'))
+
+def _rescore_loop():
+    while True:
+        time.sleep(PRIORITY_RESCORE_SECONDS)
+        try:
+            # One worker per host does the work; the others keep checking in case it exits
+            if claim_rescore_runner():
+                rescore_due()
+        except Exception as e:
+            print(f'Error re-scoring task priorities: {e}')
+
+if PRIORITY_RESCORE_SECONDS > 0 and not IS_POOL_WORKER:
+    threading.Thread(target=_rescore_loop, name='priority-rescore', daemon=True).start()
 
 # ============================================================================
 # AUTHENTICATION ROUTES
@@ -82,19 +359,18 @@ def register():
             return jsonify({'error': 'Unique ID already exists'}), 400
 
         # Check if email already exists
-        all_users = get_all_users()
-        if any(user.get('email') == email for user in all_users):
+        if get_user_by_email(email):
             return jsonify({'error': 'Email already exists'}), 400
 
         # Hash password
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        password_hash = hash_password(password)
 
         # Create user in Supabase
         user_data = {
             'unique_id': unique_id,
             'name': name,
             'email': email,
-            'password_hash': password_hash.decode('utf-8'),
+            'password_hash': password_hash,
             'role': role,
             'department': department,
             'created_at': datetime.now().isoformat()
@@ -116,7 +392,7 @@ def register():
         }), 201
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/auth/login', methods=['POST'])
 def login():
@@ -132,7 +408,7 @@ def login():
         if not user:
             return jsonify({'error': 'Invalid credentials'}), 401
 
-        if not bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
+        if not check_password(password, user['password_hash']):
             return jsonify({'error': 'Invalid credentials'}), 401
 
         # Create access token
@@ -150,7 +426,7 @@ def login():
         }), 200
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/auth/change-password', methods=['POST'])
 @jwt_required()
@@ -171,17 +447,17 @@ def change_password():
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        if not bcrypt.checkpw(current_password.encode('utf-8'), user['password_hash'].encode('utf-8')):
+        if not check_password(current_password, user['password_hash']):
             return jsonify({'error': 'Current password is incorrect'}), 400
 
         # Update password
-        new_password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
-        update_task(user.get('id'), {'password_hash': new_password_hash.decode('utf-8')})
+        new_password_hash = hash_password(new_password)
+        update_task(user.get('id'), {'password_hash': new_password_hash})
 
         return jsonify({'message': 'Password changed successfully'}), 200
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 # ============================================================================
 # TASK MANAGEMENT ROUTES
@@ -197,18 +473,86 @@ def get_all_tasks():
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        # Get all tasks from Supabase
-        all_tasks = get_tasks()
-        
-        # Filter tasks based on user role
+        # Admins see every task; everyone else gets theirs filtered in the database
         if user['role'] == 'admin':
-            user_tasks = all_tasks
+            user_tasks = get_tasks()
         else:
-            user_tasks = [task for task in all_tasks if task.get('assigned_to') == user_id or task.get('created_by') == user_id]
+            user_tasks = get_tasks_for_user(user_id)
 
         return jsonify({'tasks': user_tasks}), 200
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
+
+@app.route('/api/tasks/search', methods=['GET'])
+@jwt_required()
+def search_tasks():
+    try:
+        user_id = get_jwt_identity()
+        user = get_user_by_id(user_id)
+
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+        try:
+            limit = max(1, min(int(request.args.get('limit', 20)), 100))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+
+        # Same scoping as GET /api/tasks: admins see everything, others their own tasks
+        search_index.ensure_built()
+        search_index.sync()
+        total, ranked = search_index.search(query, None if user['role'] == 'admin' else user_id, limit)
+
+        # Only the top-k rows are fetched from Supabase
+        rows = {t['id']: t for t in get_tasks_by_ids([task_id for task_id, _ in ranked])} if ranked else {}
+        results = [dict(rows[task_id], search_score=round(score, 4)) for task_id, score in ranked if task_id in rows]
+
+        return jsonify({'tasks': results, 'total_matches': total}), 200
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/tasks/export', methods=['GET'])
+@jwt_required()
+def export_tasks():
+    try:
+        user_id = get_jwt_identity()
+        user = get_user_by_id(user_id)
+
+        if not user or user.get('role') != 'admin':
+            return jsonify({'error': 'Access denied. Only admins can export tasks'}), 403
+
+        export_format = request.args.get('format', 'csv')
+        if export_format not in ('csv', 'parquet'):
+            return jsonify({'error': 'format must be csv or parquet'}), 400
+
+        try:
+            filters = build_filters(
+                request.args.get('department'),
+                request.args.get('status'),
+                request.args.get('from'),
+                request.args.get('to')
+            )
+        except ValueError:
+            return jsonify({'error': 'from and to must be dates (YYYY-MM-DD)'}), 400
+
+        # Pages are fetched and written one at a time while the response streams;
+        # a long export is bounded per call, not by the request budget
+        clear_request_budget()
+        filename = f"tasks-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+        if export_format == 'csv':
+            body, mimetype = iter_csv(filters), 'text/csv'
+        else:
+            body, mimetype = iter_parquet(filters), 'application/vnd.apache.parquet'
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+    except Exception as e:
+        return error_response(e)
 
 @app.route('/api/tasks', methods=['POST'])
 @jwt_required()
@@ -227,15 +571,26 @@ def create_task():
         due_date = datetime.fromisoformat(data.get('dueDate', datetime.now().isoformat()))
         deadline_days = (due_date - datetime.now()).days
         
+        assigned_to = data.get('assignedTo', user_id)
+        department = data.get('department', user['department'])
+
+        # Tasks this one waits on (a new task cannot close a dependency cycle)
+        depends_on = data.get('dependsOn') or []
+        if not isinstance(depends_on, list):
+            return jsonify({'error': 'dependsOn must be a list of task ids'}), 400
+        blockers = get_tasks_by_ids(depends_on, DEPENDENCY_TASK_COLUMNS) if depends_on else []
+        if len(blockers) != len(set(depends_on)):
+            return jsonify({'error': 'dependsOn contains unknown tasks'}), 400
+
         predicted_priority = priority_predictor.predict_priority(urgency, complexity, deadline_days)
         predicted_completion_time = completion_predictor.predict_completion_time(
-            data.get('taskSize', 5), complexity
+            data.get('taskSize', 5), complexity, workload_index.efficiency(assigned_to)
         )
 
         task_data = {
             'title': data['title'],
             'description': data['description'],
-            'assigned_to': data.get('assignedTo', user_id),
+            'assigned_to': assigned_to,
             'created_by': user_id,
             'priority': predicted_priority,
             'due_date': data.get('dueDate'),
@@ -244,18 +599,75 @@ def create_task():
             'predicted_completion_time': predicted_completion_time,
             'urgency': urgency,
             'complexity': complexity,
-            'department': data.get('department', user['department']),
+            'department': department,
+            'next_rescore_at': next_rescore_at(urgency, complexity, due_date) if data.get('dueDate') else None,
             'created_at': datetime.now().isoformat()
         }
 
+        # Look for open tasks in the same department that say the same thing
+        duplicate_index.refresh_if_stale()
+        duplicate_index.sync()
+        possible_duplicates = duplicate_index.find(department, data['title'], data['description'],
+                                                   user_id=None if user['role'] == 'admin' else user_id)
+
         created_task = insert_task(task_data)
         if not created_task:
             return jsonify({'error': 'Failed to create task'}), 500
 
-        return jsonify({'task': created_task, 'message': 'Task created successfully'}), 201
+        record_task_created(created_task)
+        workload_index.task_added(created_task)
+        search_index.upsert(created_task)
+        duplicate_index.task_changed(created_task)
+        task_store.upsert(created_task)
+        delete_precomputed_suggestions([created_task.get('assigned_to')])
+
+        response = {
+            'task': created_task,
+            'possible_duplicates': possible_duplicates,
+            'message': 'Task created successfully'
+        }
+        if blockers:
+            inserted = insert_task_dependencies([
+                {'task_id': created_task['id'], 'depends_on': blocker['id'], 'created_by': user_id}
+                for blocker in blockers
+            ])
+            if not inserted:
+                # The task exists; say so, so the client does not create it again
+                return jsonify({'error': 'Task created but failed to add its dependencies', 'task': created_task}), 500
+            for blocker in blockers:
+                dependency_graph.add(created_task, blocker)
+            response['schedule'] = dependency_graph.schedule(created_task['id'])
+
+        return jsonify(response), 201
+
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/tasks/duplicates', methods=['POST'])
+@jwt_required()
+def find_duplicate_tasks():
+    try:
+        data = request.get_json()
+        user_id = get_jwt_identity()
+        user = get_user_by_id(user_id)
+
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        if not data or not data.get('title'):
+            return jsonify({'error': 'title is required'}), 400
+
+        duplicate_index.refresh_if_stale()
+        duplicate_index.sync()
+        # Same scoping as GET /api/tasks: admins see everything, others their own tasks
+        duplicates = duplicate_index.find(
+            data.get('department', user['department']), data['title'], data.get('description', ''),
+            user_id=None if user['role'] == 'admin' else user_id
+        )
+        return jsonify({'possible_duplicates': duplicates}), 200
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/tasks/<task_id>', methods=['PUT'])
 @jwt_required()
@@ -264,21 +676,132 @@ def update_single_task(task_id):
         data = request.get_json()
         user_id = get_jwt_identity()
 
-        task = get_task_by_id(task_id)
+        # Read from the primary: the old status/assignee drive rollups and the workload index
+        task = get_task_by_id(task_id, primary=True)
         if not task:
             return jsonify({'error': 'Task not found'}), 404
 
         # Update task in Supabase
         updates = {k: v for k, v in data.items() if k in ['title', 'description', 'assigned_to', 'status', 'priority']}
+        if updates.get('status') == 'completed' and task.get('status') != 'completed':
+            updates['completed_at'] = datetime.now().isoformat()
+            updates['next_rescore_at'] = None
+        elif updates.get('status') not in (None, 'completed') and task.get('status') == 'completed':
+            # Reopened: let the next re-scoring run pick it up again
+            updates['next_rescore_at'] = datetime.now().isoformat()
+        # Marks the row as changed; the database replaces it with its own clock (migration 0009)
+        updates['updated_at'] = datetime.now().isoformat()
         updated_task = update_task(task_id, updates)
 
         if not updated_task:
             return jsonify({'error': 'Failed to update task'}), 500
 
+        record_task_status_change(task, updated_task)
+        workload_index.task_changed(task, updated_task)
+        search_index.upsert(updated_task)
+        duplicate_index.task_changed(updated_task)
+        task_store.upsert(updated_task)
+        dependency_graph.task_changed(updated_task)
+        delete_precomputed_suggestions({task.get('assigned_to'), updated_task.get('assigned_to')} - {None})
+
         return jsonify({'task': updated_task, 'message': 'Task updated successfully'}), 200
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
+
+# ============================================================================
+# TASK DEPENDENCY ROUTES
+# ============================================================================
+
+@app.route('/api/tasks/<task_id>/dependencies', methods=['POST'])
+@jwt_required()
+def add_task_dependency(task_id):
+    try:
+        data = request.get_json() or {}
+        user_id = get_jwt_identity()
+        user = get_user_by_id(user_id)
+
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        depends_on = data.get('dependsOn')
+        if not depends_on:
+            return jsonify({'error': 'dependsOn is required'}), 400
+
+        tasks = {t['id']: t for t in get_tasks_by_ids([task_id, depends_on], DEPENDENCY_TASK_COLUMNS)}
+        if task_id not in tasks or depends_on not in tasks:
+            return jsonify({'error': 'Task not found'}), 404
+
+        dependency_graph.ensure_built()
+        dependency_graph.sync()
+        cycle = dependency_graph.find_cycle(task_id, depends_on)
+        if cycle:
+            return jsonify({'error': 'Dependency would create a cycle', 'cycle': cycle}), 409
+        if dependency_graph.has(task_id, depends_on):
+            return jsonify({'error': 'Dependency already exists'}), 409
+
+        if not insert_task_dependencies([{'task_id': task_id, 'depends_on': depends_on, 'created_by': user_id}]):
+            return jsonify({'error': 'Failed to add dependency'}), 500
+        try:
+            dependency_graph.add(tasks[task_id], tasks[depends_on])
+        except DependencyCycle as e:
+            # Another worker added the opposite edge first; the database trigger rejects one of them
+            print(f'Error adding task dependency: {e}')
+
+        return jsonify({'schedule': dependency_graph.schedule(task_id), 'message': 'Dependency added'}), 201
+
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/tasks/<task_id>/dependencies/<depends_on>', methods=['DELETE'])
+@jwt_required()
+def remove_task_dependency(task_id, depends_on):
+    try:
+        user_id = get_jwt_identity()
+        user = get_user_by_id(user_id)
+
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        if not delete_task_dependency(task_id, depends_on):
+            return jsonify({'error': 'Dependency not found'}), 404
+        dependency_graph.remove(task_id, depends_on)
+
+        return jsonify({'schedule': dependency_graph.schedule(task_id), 'message': 'Dependency removed'}), 200
+
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/tasks/at-risk', methods=['GET'])
+@jwt_required()
+def get_at_risk_chains():
+    try:
+        user_id = get_jwt_identity()
+        user = get_user_by_id(user_id)
+
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        dependency_graph.ensure_built()
+        dependency_graph.sync()
+        dependency_graph.refresh_if_stale()
+        # Admins see every chain; everyone else the chains that include one of their tasks
+        chains = dependency_graph.at_risk_chains(user_id=None if user['role'] == 'admin' else user_id, limit=limit)
+
+        # Titles and status come from the rows; the graph only keeps what scheduling needs
+        ids = {entry['task_id'] for chain in chains for entry in chain['chain']}
+        rows = {t['id']: t for t in get_tasks_by_ids(ids, 'id,title,status')} if ids else {}
+        for chain in chains:
+            chain['title'] = rows.get(chain['task_id'], {}).get('title')
+            for entry in chain['chain']:
+                entry['title'] = rows.get(entry['task_id'], {}).get('title')
+                entry['status'] = rows.get(entry['task_id'], {}).get('status')
+
+        return jsonify({'chains': chains}), 200
+
+    except Exception as e:
+        return error_response(e)
 
 # ============================================================================
 # ANALYTICS ROUTES
@@ -294,86 +817,161 @@ def get_dashboard_data():
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        # Get all tasks from Supabase
-        all_tasks = get_tasks()
-
-        # Calculate analytics
-        total_tasks = len(all_tasks)
-        completed_tasks = len([t for t in all_tasks if t.get('status') == 'completed'])
-        pending_tasks = len([t for t in all_tasks if t.get('status') == 'pending'])
-        overdue_tasks = len([t for t in all_tasks if t.get('status') != 'completed' and 
-                           (datetime.fromisoformat(t.get('due_date', datetime.now().isoformat())) < datetime.now())])
-
-        # Priority distribution
-        priority_dist = {
-            'high': len([t for t in all_tasks if t.get('priority') == 'High']),
-            'medium': len([t for t in all_tasks if t.get('priority') == 'Medium']),
-            'low': len([t for t in all_tasks if t.get('priority') == 'Low'])
-        }
+        # Counted with vectorized masks over the in-process columnar task store
+        task_store.ensure_built()
+        task_store.sync()
+        task_store.refresh_if_stale()
+        dashboard = computed_results.do(('dashboard', task_store.version), task_store.dashboard)
+        return jsonify(dashboard), 200
 
-        # Department productivity
-        dept_stats = {}
-        for task in all_tasks:
-            dept = task.get('department', 'General')
-            if dept not in dept_stats:
-                dept_stats[dept] = {'total': 0, 'completed': 0}
-            dept_stats[dept]['total'] += 1
-            if task.get('status') == 'completed':
-                dept_stats[dept]['completed'] += 1
+    except Exception as e:
+        return error_response(e)
 
-        return jsonify({
-            'overview': {
-                'total_tasks': total_tasks,
-                'completed_tasks': completed_tasks,
-                'pending_tasks': pending_tasks,
-                'overdue_tasks': overdue_tasks
-            },
-            'priority_distribution': priority_dist,
-            'department_stats': dept_stats
-        }), 200
+TREND_RANGES = {'7d': 7, '30d': 30, '90d': 90, '1y': 365}
+
+@app.route('/api/analytics/trends', methods=['GET'])
+@jwt_required()
+def get_trends():
+    try:
+        user_id = get_jwt_identity()
+        user = get_user_by_id(user_id)
+
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        time_range = request.args.get('range', '30d')
+        if time_range not in TREND_RANGES:
+            return jsonify({'error': f"range must be one of {', '.join(TREND_RANGES)}"}), 400
+
+        granularity = request.args.get('granularity', 'week' if time_range == '1y' else 'day')
+        if granularity not in ('day', 'week'):
+            return jsonify({'error': 'granularity must be day or week'}), 400
+
+        # Served from precomputed daily buckets: ~365 small rows for a 12-month chart
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=TREND_RANGES[time_range] - 1)
+        trends = load_trends(start_date, end_date, granularity, request.args.get('department'))
+
+        return jsonify(trends), 200
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 # ============================================================================
 # AI SUGGESTIONS ROUTE
 # ============================================================================
 
+def compute_suggestions(user_id):
+    """Compute and store one user's suggestions; returns (suggestions, open_tasks)."""
+    if task_store.built_at is not None:
+        # One scan over every assignee serves all the users whose suggestions miss at once
+        summaries = computed_results.do(('open_task_summaries', task_store.version),
+                                        lambda: task_store.open_task_summaries(DEADLINE_WINDOW_DAYS))
+        open_tasks, due_soon = summaries.get(user_id, (0, 0))
+        suggestions = build_suggestions(open_tasks, due_soon)
+    else:
+        user_tasks = get_open_tasks_for_user(user_id, 'id,assigned_to,status,due_date')
+        suggestions = score_user_tasks(user_tasks)
+        open_tasks = len(user_tasks)
+    upsert_precomputed_suggestions([{
+        'user_id': user_id,
+        'suggestions': suggestions,
+        'open_tasks': open_tasks,
+        'computed_at': datetime.now().isoformat()
+    }])
+    return suggestions, open_tasks
+
 @app.route('/api/ai/suggestions', methods=['GET'])
 @jwt_required()
 def get_ai_suggestions():
     try:
         user_id = get_jwt_identity()
-        
-        # Get all tasks from Supabase
-        all_tasks = get_tasks()
-        
-        # Generate AI suggestions based on current tasks
-        suggestions = []
-        
-        # Workload distribution suggestion
-        user_tasks = [t for t in all_tasks if t.get('assigned_to') == user_id and t.get('status') != 'completed']
-        if len(user_tasks) > 5:
-            suggestions.append({
-                'type': 'workload',
-                'message': 'You have many pending tasks. Consider delegating some to team members.',
-                'priority': 'high'
-            })
-
-        # Deadline warning
-        upcoming_deadlines = [t for t in user_tasks if 
-                            (datetime.fromisoformat(t.get('due_date', datetime.now().isoformat())) - datetime.now()).days <= 3]
-        if upcoming_deadlines:
-            suggestions.append({
-                'type': 'deadline',
-                'message': f'You have {len(upcoming_deadlines)} tasks due within 3 days.',
-                'priority': 'medium'
-            })
+
+        # Served from the precomputed table; compute on demand (and store) only on a miss
+        row = get_precomputed_suggestions(user_id)
+        if is_fresh(row):
+            suggestions = row['suggestions']
+            open_tasks = row.get('open_tasks', 0)
+        else:
+            if task_store.built_at is not None:
+                task_store.sync()
+                task_store.refresh_if_stale()
+            suggestions, open_tasks = computed_results.do(('suggestions', user_id, task_store.version),
+                                                          lambda: compute_suggestions(user_id))
+
+        # Name concrete delegates from the live workload index (copies: the result may be shared)
+        suggestions = [dict(suggestion) for suggestion in suggestions]
+        for suggestion in suggestions:
+            if suggestion['type'] != 'workload':
+                continue
+            user = get_user_by_id(user_id)
+            department = user.get('department') if user else None
+            candidates = [c for c in workload_index.recommend(department, 0.0, limit=4) if c['unique_id'] != user_id][:3]
+            if candidates:
+                suggestion['message'] = f"You have many pending tasks. Consider delegating some to {', '.join(c['name'] for c in candidates)}."
+            suggestion['candidates'] = candidates
+
+        # Deadline risk from blocking chains is live, like the delegate names above
+        if dependency_graph.built_at is not None:
+            dependency_graph.sync()
+            chains = dependency_graph.at_risk_chains(user_id=user_id, limit=5)
+            if chains:
+                suggestions.append({
+                    'type': 'dependency',
+                    'message': f"{len(chains)} of your task chains will miss a due date at the current estimates.",
+                    'priority': 'high',
+                    'task_ids': [chain['task_id'] for chain in chains]
+                })
 
         return jsonify({'suggestions': suggestions}), 200
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
+
+@app.route('/api/ai/suggestions/precompute', methods=['POST'])
+@jwt_required()
+def trigger_suggestions_precompute():
+    try:
+        user_id = get_jwt_identity()
+        user = get_user_by_id(user_id)
+
+        if not user or user.get('role') != 'admin':
+            return jsonify({'error': 'Access denied. Only admins can precompute suggestions'}), 403
+
+        store = task_store if task_store.built_at is not None else None
+        threading.Thread(target=precompute_all, args=(store,), name='suggestions-precompute', daemon=True).start()
+        return jsonify({'message': 'Suggestion precomputation started'}), 202
+
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/ai/assignees', methods=['GET'])
+@jwt_required()
+def recommend_assignees():
+    try:
+        user_id = get_jwt_identity()
+        user = get_user_by_id(user_id)
+
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        try:
+            task_size = float(request.args.get('taskSize', 5))
+            complexity = float(request.args.get('complexity', 5))
+            limit = max(1, min(int(request.args.get('limit', 5)), 50))
+            due_date = datetime.fromisoformat(request.args['dueDate']) if request.args.get('dueDate') else None
+        except ValueError:
+            return jsonify({'error': 'taskSize, complexity, limit and dueDate must be valid values'}), 400
+
+        department = request.args.get('department', user['department'])
+        workload_index.refresh_if_stale()
+        task_hours = completion_predictor.predict_completion_time(task_size, complexity)
+        candidates = workload_index.recommend(department, task_hours, due_date, limit)
+
+        return jsonify({'department': department, 'task_hours': task_hours, 'candidates': candidates}), 200
+
+    except Exception as e:
+        return error_response(e)
 
 # ============================================================================
 # DATABASE & ADMIN ROUTES
@@ -390,6 +988,31 @@ def supabase_health():
     except Exception as e:
         return jsonify({'configured': False, 'error': str(e)}), 500
 
+@app.route('/api/health/live', methods=['GET'])
+def liveness():
+    # Process is up and serving requests; never touches the database
+    return jsonify({'status': 'alive'}), 200
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness():
+    try:
+        if not _warmup_state['complete']:
+            message = 'Warmup steps failed, retrying' if _warmup_state['failed'] else 'Warmup in progress'
+            return jsonify({'ready': False, 'message': message, 'warmup': _warmup_state}), 503
+
+        # Deep check is cached in supabase_client, so probes do not add database load
+        database = health_check()
+        ready = bool(database.get('ok'))
+        return jsonify({'ready': ready, 'database': database, 'warmup': _warmup_state}), 200 if ready else 503
+    except Exception as e:
+        return jsonify({'ready': False, 'error': str(e)}), 503
+
+# Columns that may be returned from the user directory (never password_hash)
+USER_DIRECTORY_COLUMNS = ['id', 'unique_id', 'name', 'email', 'role', 'department', 'created_at']
+USER_PAGE_SIZE = 100
+# One row over the page size tells whether there is a next page, and must fit under max-rows
+USER_PAGE_SIZE_MAX = MAX_ROWS - 1
+
 @app.route('/api/users', methods=['GET'])
 @jwt_required()
 def get_users():
@@ -400,23 +1023,84 @@ def get_users():
         if not user or user.get('role') != 'admin':
             return jsonify({'error': 'Access denied. Only admins can view all users'}), 403
 
-        all_users = get_all_users()
-        # Remove password_hash from response
-        safe_users = [
-            {
-                'id': u.get('id'),
-                'unique_id': u.get('unique_id'),
-                'name': u.get('name'),
-                'email': u.get('email'),
-                'role': u.get('role'),
-                'department': u.get('department'),
-                'created_at': u.get('created_at')
-            }
-            for u in all_users
-        ]
-        return jsonify(safe_users), 200
+        # Column projection, e.g. ?fields=id,name for compact pickers
+        fields = request.args.get('fields')
+        if fields:
+            columns = [c.strip() for c in fields.split(',') if c.strip()]
+            invalid = [c for c in columns if c not in USER_DIRECTORY_COLUMNS]
+            if invalid or not columns:
+                return jsonify({'error': f"Invalid fields: {', '.join(invalid) or fields}"}), 400
+        else:
+            columns = list(USER_DIRECTORY_COLUMNS)
+
+        try:
+            limit = int(request.args.get('limit', USER_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        limit = max(1, min(limit, USER_PAGE_SIZE_MAX))
+
+        # Prefix search; strip characters that have meaning in PostgREST filters
+        search = ''.join(ch for ch in request.args.get('q', '').strip() if ch not in ',()*%\\:"')
+        cursor = request.args.get('cursor')
+        # Look up specific users by id, e.g. ?ids=a,b for the members of a team
+        ids = [i for i in ''.join(ch for ch in request.args.get('ids', '') if ch not in '()"\\ ').split(',') if i]
+        if len(ids) > USER_PAGE_SIZE_MAX:
+            return jsonify({'error': f'At most {USER_PAGE_SIZE_MAX} ids per request'}), 400
+
+        # unique_id drives keyset pagination, so fetch it even if not requested
+        query_columns = columns if 'unique_id' in columns else columns + ['unique_id']
+        rows = list_users(query_columns, limit + 1, after=cursor, search=search or None, ids=tuple(ids) or None)
+
+        page = rows[:limit]
+        next_cursor = page[-1]['unique_id'] if len(rows) > limit else None
+        if query_columns is not columns:
+            page = [{c: row.get(c) for c in columns} for row in page]
+
+        response = jsonify(page)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/users/import', methods=['POST'])
+@jwt_required()
+def bulk_import_users():
+    try:
+        user_id = get_jwt_identity()
+        user = get_user_by_id(user_id)
+
+        if not user or user.get('role') != 'admin':
+            return jsonify({'error': 'Access denied. Only admins can import users'}), 403
+
+        # Accept a multipart upload (field "file") or a raw text/csv body
+        upload = request.files.get('file')
+        text = upload.read().decode('utf-8-sig') if upload else request.get_data(as_text=True)
+        if not text.strip():
+            return jsonify({'error': 'CSV file is required'}), 400
+
+        # Hashing a large file takes longer than the request budget; calls keep their own timeout
+        clear_request_budget()
+        result = import_users(text)
+        status = 201 if result['created'] else 400
+        return jsonify(result), status
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/api/admin/profiles', methods=['GET'])
+@jwt_required()
+def list_profiles():
+    try:
+        user_id = get_jwt_identity()
+        user = get_user_by_id(user_id)
+
+        if not user or user.get('role') != 'admin':
+            return jsonify({'error': 'Access denied. Only admins can view profiles'}), 403
+
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+        return jsonify({'profiles': profiling.slowest(limit)}), 200
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check for the backend's hot queries.
+
+Every query shape the Supabase helpers send (see supabase_client.py) is
+listed in HOT_QUERIES as the SQL PostgREST generates for it. The check builds
+the schema from migrations/, asks the database for each query's plan and
+exits non-zero if any of them falls back to a sequential scan of its table,
+so an index dropped or renamed in a migration is caught before deploy.
+
+Against a local Postgres (use a scratch database) the migrations are applied,
+the tables are filled with synthetic rows and analyzed so the planner sees
+realistic sizes, and everything but the migrations is rolled back at the
+end. Without --database-url an in-memory SQLite stand-in is used; it skips
+Postgres-only statements (extensions, functions, triggers, GIN indexes,
+RLS).
+
+Usage:
+    python check_query_plans.py
+    python check_query_plans.py --database-url postgresql://localhost/gww_scratch
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+from collections import namedtuple
+
+from migrate import load_migrations, split_statements
+
+HotQuery = namedtuple('HotQuery', 'name table sql params')
+
+HOT_QUERIES = [
+    HotQuery('get_user_by_id', 'users',
+             'SELECT * FROM users WHERE unique_id = %s', ('100042',)),
+    HotQuery('get_user_by_email', 'users',
+             'SELECT * FROM users WHERE email = %s', ('user42@example.com',)),
+    HotQuery('find_existing_users', 'users',
+             'SELECT unique_id FROM users WHERE unique_id IN (%s, %s, %s)', ('100001', '100002', '100003')),
+    HotQuery('list_users page', 'users',
+             'SELECT unique_id, name, email FROM users WHERE unique_id > %s ORDER BY unique_id LIMIT 100',
+             ('100500',)),
+    HotQuery('get_task_by_id', 'tasks',
+             'SELECT * FROM tasks WHERE id = %s', ('00000000-0000-0000-0000-000000000042',)),
+    HotQuery('iter_tasks page', 'tasks',
+             'SELECT id, status FROM tasks WHERE id > %s ORDER BY id LIMIT 1000',
+             ('00000000-0000-0000-0000-000000000042',)),
+    HotQuery('get_tasks_for_user', 'tasks',
+             'SELECT * FROM tasks WHERE (assigned_to = %s OR created_by = %s) ORDER BY created_at DESC',
+             ('100042', '100042')),
+    HotQuery('get_open_tasks_for_user', 'tasks',
+             "SELECT id, due_date FROM tasks WHERE assigned_to = %s AND status <> 'completed'", ('100042',)),
+    HotQuery('export by department and status', 'tasks',
+             'SELECT * FROM tasks WHERE department = %s AND status = %s AND id > %s ORDER BY id LIMIT 5000',
+             ('Dept 3', 'in-progress', '00000000-0000-0000-0000-000000000000')),
+    HotQuery('get_tasks_due_for_rescore', 'tasks',
+             'SELECT id, urgency, complexity, due_date, status, ai_priority_score FROM tasks '
+             'WHERE next_rescore_at <= %s ORDER BY next_rescore_at LIMIT 500', ('2024-03-01T00:00:00',)),
+    HotQuery('get_tasks_updated_since page', 'tasks',
+             'SELECT * FROM tasks WHERE updated_at IS NOT NULL AND updated_at >= %s '
+             'AND (updated_at > %s OR (updated_at = %s AND id > %s)) ORDER BY updated_at, id LIMIT 1000',
+             ('2100-01-01T00:00:00', '2100-01-01T00:00:00', '2100-01-01T00:00:00',
+              '00000000-0000-0000-0000-000000000042')),
+    HotQuery('get_newest_task_update', 'tasks',
+             'SELECT updated_at FROM tasks WHERE updated_at IS NOT NULL ORDER BY updated_at DESC LIMIT 1', ()),
+    HotQuery('get_task_rollups', 'task_daily_rollups',
+             'SELECT * FROM task_daily_rollups WHERE bucket_date >= %s AND bucket_date <= %s '
+             'AND department = %s ORDER BY bucket_date',
+             ('2024-03-01', '2024-03-31', 'Dept 3')),
+    HotQuery('get_precomputed_suggestions', 'ai_suggestions',
+             'SELECT * FROM ai_suggestions WHERE user_id = %s LIMIT 1', ('100042',)),
+    HotQuery('iter_task_dependencies page', 'task_dependencies',
+             'SELECT id, task_id, depends_on FROM task_dependencies WHERE id > %s ORDER BY id LIMIT 1000',
+             ('00000000-0000-0000-0000-000000000042',)),
+    HotQuery('get_task_dependencies_since page', 'task_dependencies',
+             'SELECT id, task_id, depends_on, created_at FROM task_dependencies '
+             'WHERE created_at IS NOT NULL AND created_at >= %s '
+             'AND (created_at > %s OR (created_at = %s AND id > %s)) ORDER BY created_at, id LIMIT 1000',
+             ('2100-01-01T00:00:00', '2100-01-01T00:00:00', '2100-01-01T00:00:00',
+              '00000000-0000-0000-0000-000000000042')),
+    HotQuery('get_newest_task_dependency', 'task_dependencies',
+             'SELECT created_at FROM task_dependencies WHERE created_at IS NOT NULL '
+             'ORDER BY created_at DESC LIMIT 1', ()),
+    HotQuery('delete_task_dependency', 'task_dependencies',
+             'DELETE FROM task_dependencies WHERE task_id = %s AND depends_on = %s',
+             ('00000000-0000-0000-0000-000000000042', '00000000-0000-0000-0000-000000000041')),
+]
+
+# Synthetic data for Postgres so the planner has realistic table sizes to cost
+SEED_SQL = """
+INSERT INTO users (unique_id, name, email, password_hash, role, department)
+SELECT (100000 + g)::text, 'User ' || g, 'user' || g || '@example.com', 'x',
+       'employee', 'Dept ' || (g % 20)
+FROM generate_series(1, 20000) AS g;
+
+INSERT INTO tasks (id, title, created_by, assigned_to, status, department, due_date, created_at, updated_at,
+                   next_rescore_at)
+SELECT ('00000000-0000-0000-0000-' || lpad(g::text, 12, '0'))::uuid, 'Task ' || g,
+       (100000 + (g % 20000))::text, (100000 + ((g * 7) % 20000))::text,
+       (ARRAY['pending', 'in-progress', 'completed'])[1 + g % 3], 'Dept ' || (g % 20),
+       DATE '2024-01-01' + (g % 365), TIMESTAMP '2024-01-01' + g * INTERVAL '5 minutes',
+       TIMESTAMP '2024-01-01' + g * INTERVAL '5 minutes',
+       CASE WHEN g % 3 <> 2 THEN DATE '2024-01-01' + (g % 365) - 3 END
+FROM generate_series(1, 200000) AS g;
+
+INSERT INTO task_daily_rollups (bucket_date, department, created_count)
+SELECT DATE '2020-01-01' + d, 'Dept ' || dept, 1
+FROM generate_series(0, 1825) AS d, generate_series(0, 19) AS dept;
+
+INSERT INTO ai_suggestions (user_id, open_tasks)
+SELECT (100000 + g)::text, g % 10 FROM generate_series(1, 20000) AS g;
+
+-- Chains of ten: each task depends on the one before it
+INSERT INTO task_dependencies (task_id, depends_on, created_at)
+SELECT ('00000000-0000-0000-0000-' || lpad(g::text, 12, '0'))::uuid,
+       ('00000000-0000-0000-0000-' || lpad((g - 1)::text, 12, '0'))::uuid,
+       TIMESTAMP '2024-01-01' + g * INTERVAL '5 minutes'
+FROM generate_series(2, 100000) AS g
+WHERE g % 10 <> 1;
+
+ANALYZE users;
+ANALYZE tasks;
+ANALYZE task_daily_rollups;
+ANALYZE ai_suggestions;
+ANALYZE task_dependencies;
+"""
+
+# Statements the SQLite stand-in cannot run (and does not need for plan checks)
+_SQLITE_SKIP_RE = re.compile(r'CREATE EXTENSION|FUNCTION|TRIGGER|ROW LEVEL SECURITY|USING gin', re.IGNORECASE)
+
+
+def _to_sqlite(statement):
+    statement = re.sub(r'DEFAULT gen_random_uuid\(\)', '', statement, flags=re.IGNORECASE)
+    statement = re.sub(r'NOW\(\)', 'CURRENT_TIMESTAMP', statement, flags=re.IGNORECASE)
+    return re.sub(r'ADD COLUMN IF NOT EXISTS', 'ADD COLUMN', statement, flags=re.IGNORECASE)
+
+
+def sqlite_plans(queries=HOT_QUERIES):
+    """Yield (query, seq_scanned_tables, plan_text) from an in-memory SQLite schema."""
+    conn = sqlite3.connect(':memory:')
+    for migration in load_migrations():
+        for statement in split_statements(migration.sql):
+            if not _SQLITE_SKIP_RE.search(statement):
+                conn.execute(_to_sqlite(statement))
+    for query in queries:
+        rows = conn.execute('EXPLAIN QUERY PLAN ' + query.sql.replace('%s', '?'), query.params).fetchall()
+        details = [row[-1] for row in rows]
+        # "SCAN t" / "SCAN t USING INDEX i" read every row; "SEARCH t USING ..." is an index lookup
+        scanned = sorted({m.group(1) for m in (re.match(r'SCAN (\w+)', d) for d in details) if m})
+        yield query, scanned, '\n'.join(details)
+    conn.close()
+
+
+def _seq_scans(node):
+    scanned = {node['Relation Name']} if node.get('Node Type') == 'Seq Scan' else set()
+    for child in node.get('Plans', []):
+        scanned |= _seq_scans(child)
+    return scanned
+
+
+def postgres_plans(database_url, queries=HOT_QUERIES):
+    """Yield (query, seq_scanned_tables, plan_text) from a seeded Postgres database."""
+    from migrate import connect, migrate
+
+    conn = connect(database_url)
+    try:
+        migrate(conn)
+        with conn.cursor() as cur:
+            cur.execute(SEED_SQL)
+            for query in queries:
+                cur.execute('EXPLAIN (FORMAT JSON) ' + query.sql, query.params)
+                plan = cur.fetchone()[0]
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                yield query, sorted(_seq_scans(plan[0]['Plan'])), json.dumps(plan[0]['Plan'], indent=2)
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fail if a hot query falls back to a sequential scan.')
+    parser.add_argument('--database-url', help='Scratch Postgres database; defaults to an SQLite stand-in')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan')
+    args = parser.parse_args(argv)
+
+    print("Global Web Work - Query plan check")
+    print("=" * 50)
+    plans = postgres_plans(args.database_url) if args.database_url else sqlite_plans()
+    failures = 0
+    for query, scanned, plan in plans:
+        if scanned:
+            failures += 1
+            print(f"✗ {query.name}: sequential scan on {', '.join(scanned)}")
+        else:
+            print(f"✓ {query.name}")
+        if scanned or args.verbose:
+            print('    ' + plan.replace('\n', '\n    '))
+    print(f"{len(HOT_QUERIES) - failures} of {len(HOT_QUERIES)} hot queries use an index")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,399 @@
+"""
+Task dependency graph with incremental earliest-finish and slack.
+
+A task_dependencies row says a task cannot finish before the task it depends
+on. DependencyGraph holds every task that takes part in a dependency and
+keeps two values per task:
+
+- earliest finish: hours of work left before it can be done, i.e. its own
+  predicted_completion_time plus the longest open chain of blockers (0 once
+  it is completed);
+- latest finish: the latest moment it can be done without it or anything
+  that depends on it missing a due date.
+
+Slack is the gap between the two. A task whose projected finish is past its
+due date is at risk, and following each task's slowest blocker gives the
+critical chain that makes it late.
+
+Tasks keep a topological order that is repaired locally when a dependency is
+added (Pearce-Kelly): only the tasks between the two ends of the new edge are
+visited, which is also where a cycle would show up. Changes then propagate
+through a heap in that order, forward to dependents for earliest finish and
+backward to blockers for latest finish, and stop where a value does not
+change. An update therefore touches only the affected part of the graph.
+
+Like the other in-process indexes, the graph is built once, updated by the
+task and dependency routes, and caught up with other workers through task
+`updated_at` and dependency `created_at` (see index_sync); a periodic rebuild also drops
+dependencies other workers removed. Remaining hours count as elapsed time.
+"""
+
+import heapq
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from index_sync import ChangeFeed, Refresher
+from supabase_client import (
+    iter_task_dependencies,
+    get_task_dependencies_since,
+    get_newest_task_dependency,
+    get_newest_task_update,
+    get_tasks_by_ids,
+    get_tasks_updated_since
+)
+from task_store import to_epoch, EPOCH, NO_DATE
+
+SYNC_SECONDS = float(os.environ.get('DEPENDENCY_SYNC_SECONDS', '5'))
+REFRESH_SECONDS = float(os.environ.get('DEPENDENCY_REFRESH_SECONDS', '300'))
+TASK_COLUMNS = 'id,status,predicted_completion_time,due_date,assigned_to,updated_at'
+FETCH_BATCH_SIZE = 200
+HOUR = 3600.0
+
+# Per-task state, swapped in as a whole by rebuild()
+_STATE = ('_preds', '_succs', '_order', '_next_order', '_open', '_hours', '_due', '_assigned',
+          '_finish', '_critical', '_latest')
+
+
+class DependencyCycle(Exception):
+    """The dependency would make a task wait, directly or not, on itself."""
+
+    def __init__(self, cycle):
+        super().__init__('Dependency would create a cycle: ' + ' -> '.join(cycle))
+        self.cycle = cycle
+
+
+def _iso(epoch):
+    return None if math.isinf(epoch) else (EPOCH + timedelta(seconds=epoch)).isoformat(timespec='seconds')
+
+
+class DependencyGraph:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.built_at = None
+        self._tasks_feed = ChangeFeed(lambda since: get_tasks_updated_since(since, TASK_COLUMNS),
+                                      get_newest_task_update, SYNC_SECONDS)
+        self._edges_feed = ChangeFeed(get_task_dependencies_since, get_newest_task_dependency, SYNC_SECONDS,
+                                      column='created_at')
+        self._refresher = Refresher(self.rebuild, REFRESH_SECONDS, 'dependency graph')
+        self._preds = {}          # task_id -> ids it depends on
+        self._succs = {}          # task_id -> ids that depend on it
+        self._order = {}          # task_id -> position in a topological order
+        self._next_order = 0
+        self._open = {}           # task_id -> not completed
+        self._hours = {}          # remaining hours (0 once completed)
+        self._due = {}            # due date as epoch seconds (inf without one)
+        self._assigned = {}
+        self._finish = {}         # earliest finish, hours from now
+        self._critical = {}       # the blocker that sets the earliest finish (or None)
+        self._latest = {}         # latest finish, epoch seconds (inf if nothing downstream is due)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def rebuild(self):
+        """Load every dependency and the tasks at both ends from Supabase."""
+        edges_watermark, tasks_watermark = self._edges_feed.mark(), self._tasks_feed.mark()
+        edges = [(row['task_id'], row['depends_on']) for page in iter_task_dependencies() for row in page]
+        graph = DependencyGraph()
+        for task in _fetch_tasks({task_id for edge in edges for task_id in edge}):
+            graph._set_task(task)
+        skipped = 0
+        for task_id, depends_on in edges:
+            if task_id not in graph._order or depends_on not in graph._order:
+                continue
+            try:
+                graph._link(task_id, depends_on)
+            except DependencyCycle as e:
+                skipped += 1
+                print(f'Skipping task dependency: {e}')
+        graph._propagate(graph._order, graph._order)
+        with self._lock:
+            for name in _STATE:
+                setattr(self, name, getattr(graph, name))
+            self.built_at = time.monotonic()
+            self._edges_feed.loaded(edges_watermark)
+            self._tasks_feed.loaded(tasks_watermark)
+        return {'ok': True, 'tasks': len(graph._order), 'dependencies': len(edges) - skipped}
+
+    def ensure_built(self):
+        if self.built_at is None:
+            with self._lock:
+                if self.built_at is None:
+                    self.rebuild()
+
+    def refresh_if_stale(self):
+        """Rebuild in a background thread when the graph is older than REFRESH_SECONDS."""
+        return self._refresher.start_if_stale(self.built_at, build_missing=False)
+
+    def sync(self):
+        """Pull dependencies added and tasks changed by other workers since the newest ones already seen."""
+        rows = self._edges_feed.poll()
+        changed = self._tasks_feed.poll()
+        if rows is None and changed is None:
+            return 0
+        rows, changed = rows or [], changed or []
+        edges = [(row['task_id'], row['depends_on']) for row in rows]
+        with self._lock:
+            missing = {task_id for edge in edges for task_id in edge if task_id not in self._order}
+        new_tasks = _fetch_tasks(missing)
+        with self._lock:
+            for task in new_tasks:
+                self._set_task(task)
+            new_ids = {task['id'] for task in new_tasks}
+            self._propagate(new_ids, new_ids)
+            for task in changed:
+                self.task_changed(task)
+            for task_id, depends_on in edges:
+                if task_id in self._order and depends_on in self._order:
+                    try:
+                        self._add_edge(task_id, depends_on)
+                    except DependencyCycle as e:
+                        print(f'Skipping task dependency: {e}')
+            self._tasks_feed.advance(changed)
+            # Edges whose tasks could not be read are read again on the next sync
+            if new_ids >= missing:
+                self._edges_feed.advance(rows)
+        return len(edges) + len(changed)
+
+    def add(self, task, blocker):
+        """Record that ``task`` depends on ``blocker`` (task rows). Raises DependencyCycle."""
+        with self._lock:
+            if self.built_at is None:
+                return False
+            cycle = self.find_cycle(task['id'], blocker['id'])
+            if cycle:
+                raise DependencyCycle(cycle)
+            forward, backward = set(), set()
+            for row in (task, blocker):
+                if self._set_task(row):
+                    forward.add(row['id'])
+                    backward |= {row['id']} | self._preds[row['id']]
+            self._propagate(forward, backward)
+            return self._add_edge(task['id'], blocker['id'])
+
+    def remove(self, task_id, depends_on):
+        with self._lock:
+            if depends_on not in self._preds.get(task_id, ()):
+                return False
+            self._preds[task_id].discard(depends_on)
+            self._succs[depends_on].discard(task_id)
+            self._propagate({task_id}, {depends_on})
+            return True
+
+    def task_changed(self, task):
+        """Re-schedule after a task's status, estimate or due date changed (ignored if it has no dependencies)."""
+        with self._lock:
+            task_id = task['id']
+            if task_id not in self._order or not self._set_task(task):
+                return
+            self._propagate({task_id}, {task_id} | self._preds[task_id])
+
+    def _set_task(self, task):
+        """Store a task's scheduling fields; returns whether they changed."""
+        task_id = task['id']
+        if task_id not in self._order:
+            self._order[task_id] = self._next_order
+            self._next_order += 1
+            self._preds[task_id], self._succs[task_id] = set(), set()
+            self._finish[task_id], self._critical[task_id], self._latest[task_id] = 0.0, None, math.inf
+        is_open = task.get('status') != 'completed'
+        hours = float(task.get('predicted_completion_time') or 0) if is_open else 0.0
+        due = to_epoch(task.get('due_date'))
+        due = math.inf if due == NO_DATE else float(due)
+        self._assigned[task_id] = task.get('assigned_to')
+        changed = (self._open.get(task_id), self._hours.get(task_id), self._due.get(task_id)) != (is_open, hours, due)
+        self._open[task_id], self._hours[task_id], self._due[task_id] = is_open, hours, due
+        return changed
+
+    def _add_edge(self, task_id, depends_on):
+        if not self._link(task_id, depends_on):
+            return False
+        self._propagate({task_id}, {depends_on})
+        return True
+
+    def _link(self, task_id, depends_on):
+        """Add the edge and repair the topological order (Pearce-Kelly)."""
+        if depends_on in self._preds[task_id]:
+            return False
+        order = self._order
+        lower, upper = order[task_id], order[depends_on]
+        if lower < upper:
+            # task_id sits before its new blocker: reorder only the tasks between the two
+            forward = self._dependents_within(task_id, upper)
+            if depends_on in forward:
+                raise DependencyCycle(self._cycle_path(forward, task_id, depends_on))
+            backward = self._blockers_within(depends_on, lower)
+            moved = sorted(backward, key=order.get) + sorted(forward, key=order.get)
+            for node, slot in zip(moved, sorted(order[node] for node in moved)):
+                order[node] = slot
+        self._preds[task_id].add(depends_on)
+        self._succs[depends_on].add(task_id)
+        return True
+
+    def _dependents_within(self, start, upper):
+        """Tasks that (transitively) depend on ``start`` and sit at or before ``upper``, with DFS parents."""
+        parents = {start: None}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for dependent in self._succs[node]:
+                if dependent not in parents and self._order[dependent] <= upper:
+                    parents[dependent] = node
+                    stack.append(dependent)
+        return parents
+
+    def _blockers_within(self, start, lower):
+        seen = {start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for blocker in self._preds[node]:
+                if blocker not in seen and self._order[blocker] >= lower:
+                    seen.add(blocker)
+                    stack.append(blocker)
+        return seen
+
+    @staticmethod
+    def _cycle_path(parents, task_id, depends_on):
+        # Each task in the path depends on the one before it; the new edge closes the loop
+        path = [depends_on]
+        while path[-1] != task_id:
+            path.append(parents[path[-1]])
+        return path[::-1] + [task_id]
+
+    def _propagate(self, forward, backward):
+        """Recompute earliest finish downstream of ``forward`` and latest finish upstream of ``backward``."""
+        order = self._order
+        heap = [(order[node], node) for node in forward]
+        heapq.heapify(heap)
+        queued = set(forward)
+        while heap:
+            _, node = heapq.heappop(heap)
+            queued.discard(node)
+            start, critical = 0.0, None
+            # A completed task no longer waits on anything, even if its blockers are open
+            for blocker in self._preds[node] if self._open[node] else ():
+                if self._finish[blocker] > start:
+                    start, critical = self._finish[blocker], blocker
+            self._critical[node] = critical
+            finish = start + self._hours[node]
+            if finish != self._finish[node]:
+                self._finish[node] = finish
+                for dependent in self._succs[node]:
+                    if dependent not in queued:
+                        queued.add(dependent)
+                        heapq.heappush(heap, (order[dependent], dependent))
+
+        heap = [(-order[node], node) for node in backward]
+        heapq.heapify(heap)
+        queued = set(backward)
+        while heap:
+            _, node = heapq.heappop(heap)
+            queued.discard(node)
+            latest = self._due[node]
+            for dependent in self._succs[node]:
+                if self._open[dependent]:
+                    latest = min(latest, self._latest[dependent] - self._hours[dependent] * HOUR)
+            if latest != self._latest[node]:
+                self._latest[node] = latest
+                for blocker in self._preds[node]:
+                    if blocker not in queued:
+                        queued.add(blocker)
+                        heapq.heappush(heap, (-order[blocker], blocker))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def has(self, task_id, depends_on):
+        with self._lock:
+            return depends_on in self._preds.get(task_id, ())
+
+    def find_cycle(self, task_id, depends_on):
+        """The cycle adding this dependency would close (list of task ids), or None."""
+        if task_id == depends_on:
+            return [task_id, task_id]
+        with self._lock:
+            if task_id not in self._order or depends_on not in self._order:
+                return None
+            # A topological order puts every task that depends on task_id after it
+            if self._order[task_id] > self._order[depends_on]:
+                return None
+            parents = self._dependents_within(task_id, self._order[depends_on])
+            return self._cycle_path(parents, task_id, depends_on) if depends_on in parents else None
+
+    def _chain(self, task_id):
+        chain = [task_id]
+        while self._critical[chain[-1]] is not None:
+            chain.append(self._critical[chain[-1]])
+        return chain[::-1]
+
+    def _entry(self, task_id, now_epoch):
+        finish = now_epoch + self._finish[task_id] * HOUR
+        latest = self._latest[task_id]
+        return {
+            'task_id': task_id,
+            'assigned_to': self._assigned.get(task_id),
+            'remaining_hours': round(self._hours[task_id], 2),
+            'projected_finish': _iso(finish),
+            'latest_finish': _iso(latest),
+            'slack_hours': None if math.isinf(latest) else round((latest - finish) / HOUR, 2)
+        }
+
+    def schedule(self, task_id, now=None):
+        """Blockers, dependents, projected finish, slack and critical chain of one task (or None)."""
+        now_epoch = to_epoch(now or datetime.now())
+        with self._lock:
+            if task_id not in self._order:
+                return None
+            entry = self._entry(task_id, now_epoch)
+            entry['depends_on'] = sorted(self._preds[task_id])
+            entry['blocks'] = sorted(self._succs[task_id])
+            entry['critical_chain'] = self._chain(task_id)
+            return entry
+
+    def at_risk_chains(self, now=None, user_id=None, limit=20):
+        """Open tasks projected to finish after their due date, latest first, each with its critical chain.
+
+        With ``user_id``, only chains that include a task assigned to that user.
+        Tasks already shown inside a longer reported chain are not repeated.
+        """
+        now_epoch = to_epoch(now or datetime.now())
+        with self._lock:
+            late = []
+            for task_id, due in self._due.items():
+                finish = now_epoch + self._finish[task_id] * HOUR
+                if self._open[task_id] and finish > due:
+                    late.append((finish - due, task_id))
+            late.sort(key=lambda item: -item[0])
+
+            chains, covered = [], set()
+            for late_seconds, task_id in late:
+                if task_id in covered:
+                    continue
+                chain = self._chain(task_id)
+                covered.update(chain)
+                if user_id is not None and all(self._assigned.get(node) != user_id for node in chain):
+                    continue
+                chains.append({
+                    'task_id': task_id,
+                    'due_date': _iso(self._due[task_id]),
+                    'projected_finish': _iso(now_epoch + self._finish[task_id] * HOUR),
+                    'late_hours': round(late_seconds / HOUR, 2),
+                    'chain': [self._entry(node, now_epoch) for node in chain]
+                })
+                if len(chains) >= limit:
+                    break
+            return chains
+
+
+def _fetch_tasks(task_ids):
+    task_ids = list(task_ids)
+    tasks = []
+    for start in range(0, len(task_ids), FETCH_BATCH_SIZE):
+        tasks += get_tasks_by_ids(task_ids[start:start + FETCH_BATCH_SIZE], TASK_COLUMNS)
+    return tasks
@@ -0,0 +1,294 @@
+"""
+Near-duplicate task detection.
+
+DuplicateIndex keeps one block of open tasks per department (blocking keeps
+each lookup to that department's rows). Text is vectorized with a stateless
+HashingVectorizer, so nothing is refit: a new task becomes one sparse row,
+weighted with the department's current IDF and L2-normalized. Rows collect
+in a short pending list that is merged into the main matrix in batches; the
+main matrix is re-weighted with fresh IDF only when it is merged. Document
+frequencies are kept only for the features a department uses. A lookup is a
+sparse matrix times dense vector product giving cosine similarity against
+every open task in the department; the dense query vector is one scratch
+buffer per index, reset after each lookup.
+
+Like the other in-process indexes, it is caught up with other workers'
+writes through `updated_at` (see index_sync). Lookups for someone other than
+an admin only return the tasks they can see in the task list. Changes that arrive while a rebuild is loading
+are replayed onto the rebuilt index unless it already read a newer version.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from index_sync import ChangeFeed, Refresher
+from supabase_client import iter_tasks, get_tasks_updated_since, get_newest_task_update, newest_timestamp
+
+SIMILARITY_THRESHOLD = float(os.environ.get('DUPLICATE_SIMILARITY_THRESHOLD', '0.75'))
+REFRESH_SECONDS = float(os.environ.get('DUPLICATES_REFRESH_SECONDS', '300'))
+SYNC_SECONDS = float(os.environ.get('DUPLICATES_SYNC_SECONDS', '5'))
+PENDING_MERGE_ROWS = 256
+TASK_COLUMNS = 'id,title,description,department,status,assigned_to,created_by,updated_at'
+
+_vectorizer = HashingVectorizer(
+    n_features=2 ** 18, alternate_sign=False, norm=None, ngram_range=(1, 2), stop_words='english'
+)
+
+
+def _task_text(title, description):
+    # Titles are short but most telling, so they are counted twice
+    return f"{title or ''} {title or ''} {description or ''}"
+
+
+def _term_counts(texts):
+    counts = _vectorizer.transform(texts).tocsr()
+    counts.data = 1 + np.log(counts.data)   # sublinear tf
+    return counts
+
+
+def _normalize(matrix):
+    """L2-normalize the rows of a CSR matrix in place."""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix.data /= np.repeat(norms, np.diff(matrix.indptr))
+    return matrix
+
+
+class _DepartmentBlock:
+    def __init__(self):
+        self.doc_freq = {}          # feature -> rows containing it (only features in use)
+        self.count = 0
+        self.rows = {}              # task_id -> (matrix, row) where matrix is 'main' or 'pending'
+        self.main_ids = []
+        self.main_tf = sparse.csr_matrix((0, _vectorizer.n_features))
+        self.main = self.main_tf
+        self.main_alive = np.zeros(0, dtype=bool)
+        self.pending_ids = []
+        self.pending_tf = []
+        self.pending = []           # weighted (indices, values) per pending row
+
+    def load(self, task_ids, tf):
+        """Fill an empty block with many rows at once (used by rebuild)."""
+        features, counts = np.unique(tf.indices, return_counts=True)
+        self.doc_freq = dict(zip(features.tolist(), counts.tolist()))
+        self.count = len(task_ids)
+        self.main_ids = list(task_ids)
+        self.main_tf = tf
+        self.main_alive = np.ones(len(task_ids), dtype=bool)
+        self.main = self.weight(tf)
+        self.rows = {task_id: ('main', i) for i, task_id in enumerate(self.main_ids)}
+
+    def _doc_freq(self, indices):
+        if not self.doc_freq:
+            return np.zeros(len(indices))
+        if len(indices) <= 1024:
+            return np.fromiter((self.doc_freq.get(i, 0) for i in indices.tolist()), dtype=np.float64, count=len(indices))
+        # Whole matrices: look every entry up at once in the sorted features
+        features = np.fromiter(self.doc_freq.keys(), dtype=np.int64, count=len(self.doc_freq))
+        counts = np.fromiter(self.doc_freq.values(), dtype=np.float64, count=len(self.doc_freq))
+        order = np.argsort(features)
+        features, counts = features[order], counts[order]
+        positions = np.minimum(np.searchsorted(features, indices), len(features) - 1)
+        return np.where(features[positions] == indices, counts[positions], 0.0)
+
+    def _count_terms(self, indices, delta):
+        for feature in indices.tolist():
+            value = self.doc_freq.get(feature, 0) + delta
+            if value:
+                self.doc_freq[feature] = value
+            else:
+                del self.doc_freq[feature]
+
+    def idf(self, indices):
+        return np.log((1 + self.count) / (1 + self._doc_freq(indices))) + 1
+
+    def weight(self, tf):
+        """Apply the current IDF to term counts and L2-normalize each row."""
+        weighted = tf.tocsr(copy=True)
+        weighted.data = weighted.data * self.idf(weighted.indices)
+        return _normalize(weighted)
+
+    def add(self, task_id, tf_row, merge=True):
+        self.remove(task_id)
+        self._count_terms(tf_row.indices, 1)
+        self.count += 1
+        self.rows[task_id] = ('pending', len(self.pending_ids))
+        self.pending_ids.append(task_id)
+        self.pending_tf.append(tf_row)
+        weighted = self.weight(tf_row)
+        self.pending.append((weighted.indices, weighted.data))
+        if merge and len(self.pending_ids) >= PENDING_MERGE_ROWS:
+            self.merge()
+
+    def remove(self, task_id):
+        location = self.rows.pop(task_id, None)
+        if location is None:
+            return
+        where, row = location
+        if where == 'main':
+            tf_row = self.main_tf[row]
+            self.main_alive[row] = False
+        else:
+            tf_row = self.pending_tf[row]
+            self.pending_ids[row] = None
+        self._count_terms(tf_row.indices, -1)
+        self.count -= 1
+
+    def merge(self):
+        """Fold pending rows into the main matrix and re-weight it with current IDF."""
+        keep = np.flatnonzero(self.main_alive)
+        live_pending = [i for i, task_id in enumerate(self.pending_ids) if task_id is not None]
+        self.main_tf = sparse.vstack(
+            [self.main_tf[keep]] + [self.pending_tf[i] for i in live_pending], format='csr'
+        )
+        self.main_ids = [self.main_ids[i] for i in keep] + [self.pending_ids[i] for i in live_pending]
+        self.main_alive = np.ones(len(self.main_ids), dtype=bool)
+        self.main = self.weight(self.main_tf)
+        self.rows = {task_id: ('main', i) for i, task_id in enumerate(self.main_ids)}
+        self.pending_ids, self.pending_tf, self.pending = [], [], []
+
+    def nearest(self, tf_row, limit, threshold, query):
+        """Closest rows to ``tf_row``; ``query`` is an all-zero scratch vector, left zeroed."""
+        if self.count == 0:
+            return []
+        weighted = self.weight(tf_row)
+        query[weighted.indices] = weighted.data
+        try:
+            matches = []
+            if self.main.shape[0]:
+                # Sparse matrix times dense vector: cosine similarity with every main row
+                scores = self.main @ query
+                scores[~self.main_alive] = 0.0
+                matches += [(self.main_ids[i], scores[i]) for i in np.flatnonzero(scores >= threshold)]
+            for task_id, (indices, values) in zip(self.pending_ids, self.pending):
+                if task_id is not None:
+                    score = float(query[indices] @ values)
+                    if score >= threshold:
+                        matches.append((task_id, score))
+        finally:
+            query[weighted.indices] = 0.0
+        matches.sort(key=lambda item: -item[1])
+        return matches[:limit]
+
+
+class DuplicateIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.built_at = None
+        self._feed = ChangeFeed(lambda since: get_tasks_updated_since(since, TASK_COLUMNS),
+                                get_newest_task_update, SYNC_SECONDS)
+        self._refresher = Refresher(self.rebuild, REFRESH_SECONDS, 'duplicate index')
+        self._replay = None         # task_id -> latest change seen while a rebuild is loading
+        self._blocks = {}
+        self._titles = {}           # task_id -> title, for responses
+        self._departments = {}      # task_id -> department
+        self._owners = {}           # task_id -> (assigned_to, created_by)
+        self._query = np.zeros(_vectorizer.n_features)  # lookup scratch, used under the lock
+
+    def rebuild(self):
+        """Vectorize every open task from Supabase, one page at a time."""
+        with self._lock:
+            self._replay = {}
+        try:
+            parts = {}              # department -> ([task ids], [term count matrices])
+            titles = {}
+            departments = {}
+            owners = {}
+            loaded = {}             # task_id -> updated_at of the version read
+            watermark = self._feed.mark()
+            for page in iter_tasks(TASK_COLUMNS, exclude_status='completed'):
+                counts = _term_counts([_task_text(t.get('title'), t.get('description')) for t in page])
+                rows = {}
+                for i, task in enumerate(page):
+                    department = task.get('department') or 'General'
+                    rows.setdefault(department, []).append(i)
+                    titles[task['id']] = task.get('title')
+                    departments[task['id']] = department
+                    owners[task['id']] = (task.get('assigned_to'), task.get('created_by'))
+                    loaded[task['id']] = newest_timestamp([task])
+                for department, indices in rows.items():
+                    ids, matrices = parts.setdefault(department, ([], []))
+                    ids.extend(page[i]['id'] for i in indices)
+                    matrices.append(counts[indices])
+            # One IDF pass per department instead of one merge per PENDING_MERGE_ROWS tasks
+            blocks = {}
+            for department, (ids, matrices) in parts.items():
+                blocks[department] = _DepartmentBlock()
+                blocks[department].load(ids, sparse.vstack(matrices, format='csr'))
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+        with self._lock:
+            replay, self._replay = self._replay, None
+            self._blocks, self._titles, self._departments, self._owners = blocks, titles, departments, owners
+            self.built_at = time.monotonic()
+            self._feed.loaded(watermark)
+            # Changes made while loading, unless the rebuild already read the same or a newer version
+            for task_id, task in replay.items():
+                seen = loaded.get(task_id)
+                changed = newest_timestamp([task])
+                if seen is None or changed is None or changed >= seen:
+                    self._apply(task)
+        return {'ok': True, 'tasks': len(self._titles), 'departments': len(blocks)}
+
+    def refresh_if_stale(self):
+        """Rebuild in a background thread when the index is older than REFRESH_SECONDS."""
+        return self._refresher.start_if_stale(self.built_at)
+
+    def sync(self):
+        """Pull tasks written by other workers since the newest one already seen."""
+        changed = self._feed.poll()
+        if changed is None:
+            return 0
+        with self._lock:
+            for task in changed:
+                self.task_changed(task)
+            self._feed.advance(changed)
+        return len(changed)
+
+    def find(self, department, title, description, limit=5, threshold=SIMILARITY_THRESHOLD, user_id=None):
+        """Return open tasks in ``department`` whose text is close to the given one.
+
+        With ``user_id`` only tasks assigned to or created by that user are returned.
+        """
+        tf_row = _term_counts([_task_text(title, description)])
+        with self._lock:
+            block = self._blocks.get(department or 'General')
+            if block is None:
+                return []
+            matches = block.nearest(tf_row, None, threshold, self._query)
+            if user_id is not None:
+                matches = [(task_id, score) for task_id, score in matches if user_id in self._owners.get(task_id, ())]
+            return [
+                {'id': task_id, 'title': self._titles.get(task_id), 'similarity': round(float(score), 3)}
+                for task_id, score in matches[:limit]
+            ]
+
+    def task_changed(self, task):
+        """Add, re-vectorize or drop one task after it was created or updated."""
+        with self._lock:
+            if self._replay is not None:
+                self._replay[task['id']] = task
+            if self.built_at is not None:
+                self._apply(task)
+
+    def _apply(self, task):
+        self._titles.pop(task['id'], None)
+        self._owners.pop(task['id'], None)
+        previous = self._departments.pop(task['id'], None)
+        if previous is not None:
+            self._blocks[previous].remove(task['id'])
+        if task.get('status') == 'completed':
+            return
+        department = task.get('department') or 'General'
+        tf_row = _term_counts([_task_text(task.get('title'), task.get('description'))])
+        self._blocks.setdefault(department, _DepartmentBlock()).add(task['id'], tf_row[0])
+        self._titles[task['id']] = task.get('title')
+        self._departments[task['id']] = department
+        self._owners[task['id']] = (task.get('assigned_to'), task.get('created_by'))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Export tasks to CSV or Parquet for the reporting pipeline.
+
+Tasks are read one keyset-paginated page at a time and written out before the
+next page is fetched, so memory stays constant however many rows are exported.
+CSV is streamed page by page; Parquet gets one row group per page.
+
+Usage:
+    python export_tasks.py --format csv --out tasks.csv
+    python export_tasks.py --format parquet --out tasks.parquet \\
+        [--department IT] [--status pending] [--from 2024-01-01] [--to 2024-12-31]
+"""
+
+import argparse
+import io
+import sys
+from datetime import date, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+from supabase_client import iter_tasks, MAX_ROWS
+
+# Larger pages would be cut to PostgREST's max-rows anyway (iter_tasks clamps --page-size too)
+PAGE_SIZE = MAX_ROWS
+
+# Fixed schema so every page/row group has identical columns and types
+EXPORT_SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('title', pa.string()),
+    ('description', pa.string()),
+    ('assigned_to', pa.string()),
+    ('created_by', pa.string()),
+    ('priority', pa.string()),
+    ('due_date', pa.date32()),
+    ('status', pa.string()),
+    ('ai_priority_score', pa.string()),
+    ('predicted_completion_time', pa.float64()),
+    ('urgency', pa.int64()),
+    ('complexity', pa.int64()),
+    ('department', pa.string()),
+    ('completed_at', pa.timestamp('us')),
+    ('created_at', pa.timestamp('us')),
+    ('updated_at', pa.timestamp('us'))
+])
+EXPORT_COLUMNS = EXPORT_SCHEMA.names
+
+
+def build_filters(department=None, status=None, created_from=None, created_to=None):
+    """Translate export options into iter_tasks filters (dates are inclusive ISO dates)."""
+    filters = []
+    if department:
+        filters.append(('eq', 'department', department))
+    if status:
+        filters.append(('eq', 'status', status))
+    if created_from:
+        filters.append(('gte', 'created_at', date.fromisoformat(created_from).isoformat()))
+    if created_to:
+        filters.append(('lt', 'created_at', (date.fromisoformat(created_to) + timedelta(days=1)).isoformat()))
+    return filters
+
+
+def _page_frame(page):
+    frame = pd.DataFrame.from_records(page, columns=EXPORT_COLUMNS)
+    for column in ('completed_at', 'created_at', 'updated_at'):
+        # utc=True accepts offset and naive strings alike; the offset is then dropped
+        frame[column] = pd.to_datetime(frame[column], errors='coerce', format='ISO8601', utc=True).dt.tz_localize(None)
+    frame['due_date'] = pd.to_datetime(frame['due_date'], errors='coerce', format='ISO8601').dt.date
+    frame['predicted_completion_time'] = pd.to_numeric(frame['predicted_completion_time'], errors='coerce')
+    for column in ('urgency', 'complexity'):
+        frame[column] = pd.to_numeric(frame[column], errors='coerce').astype('Int64')
+    return frame
+
+
+def iter_frames(filters, page_size=PAGE_SIZE):
+    """Yield one typed DataFrame per page of matching tasks."""
+    for page in iter_tasks(','.join(EXPORT_COLUMNS), page_size=page_size, filters=filters):
+        yield _page_frame(page)
+
+
+def iter_csv(filters, page_size=PAGE_SIZE):
+    """Yield CSV text, one chunk per page of tasks (header first)."""
+    yield ','.join(EXPORT_COLUMNS) + '\n'
+    for frame in iter_frames(filters, page_size):
+        yield frame.to_csv(index=False, header=False)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def write_parquet(writer, filters, page_size=PAGE_SIZE):
+    """Write one row group per page of tasks, yielding the running row count."""
+    rows = 0
+    for frame in iter_frames(filters, page_size):
+        writer.write_table(pa.Table.from_pandas(frame, schema=EXPORT_SCHEMA, preserve_index=False))
+        rows += len(frame)
+        yield rows
+
+
+def iter_parquet(filters, page_size=PAGE_SIZE):
+    """Yield Parquet bytes as each row group is written (footer last)."""
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, EXPORT_SCHEMA)
+    try:
+        for _ in write_parquet(writer, filters, page_size):
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export tasks to CSV or Parquet.')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--out', required=True, help='Output file path')
+    parser.add_argument('--department')
+    parser.add_argument('--status')
+    parser.add_argument('--from', dest='created_from', help='Created on or after (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='created_to', help='Created on or before (YYYY-MM-DD)')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE,
+                        help=f'rows per request, at most {MAX_ROWS}')
+    args = parser.parse_args(argv)
+
+    filters = build_filters(args.department, args.status, args.created_from, args.created_to)
+    print("Global Web Work - Task export")
+    print("=" * 50)
+
+    rows = 0
+    if args.format == 'csv':
+        with open(args.out, 'w', newline='', encoding='utf-8') as out:
+            out.write(','.join(EXPORT_COLUMNS) + '\n')
+            for frame in iter_frames(filters, args.page_size):
+                frame.to_csv(out, index=False, header=False)
+                rows += len(frame)
+                print(f"  {rows} rows written", end='\r')
+    else:
+        with pq.ParquetWriter(args.out, EXPORT_SCHEMA) as writer:
+            for rows in write_parquet(writer, filters, args.page_size):
+                print(f"  {rows} rows written", end='\r')
+    print(f"✓ Exported {rows} tasks to {args.out}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Bulk import users from a CSV file.
+
+The CSV needs a header with uniqueId (or unique_id), name, email and password;
+role and department are optional. Rows are validated with the same rules as
+/api/auth/register, IDs and emails are checked for duplicates in one
+set-based pass, passwords are hashed across a process pool and users are
+inserted with multi-row requests. The pool's workers are spawned, not forked:
+the API server calls this from a multi-threaded worker, and a forked child
+could inherit a lock another thread was holding.
+
+Usage:
+    python import_users.py users.csv [--workers N]
+"""
+
+import csv
+import io
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import bcrypt
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+from profiling import timer
+from supabase_client import find_existing_users, insert_users
+
+INSERT_BATCH_SIZE = 500
+
+
+def _hash_password(password):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def parse_rows(text):
+    """Read CSV text into dicts with normalized keys."""
+    reader = csv.DictReader(io.StringIO(text))
+    rows = []
+    for row in reader:
+        row = {(k or '').strip(): (v or '').strip() for k, v in row.items()}
+        rows.append({
+            'unique_id': row.get('uniqueId') or row.get('unique_id'),
+            'name': row.get('name'),
+            'email': row.get('email'),
+            'password': row.get('password'),
+            'role': row.get('role') or 'employee',
+            'department': row.get('department') or 'General'
+        })
+    return rows
+
+
+def validate_rows(rows):
+    """Split rows into (valid, errors); errors carry the 1-based CSV line number."""
+    errors = []
+    candidates = []
+    seen_ids, seen_emails = set(), set()
+    for line, row in enumerate(rows, start=2):
+        unique_id, password = row['unique_id'], row['password']
+        if not unique_id or not unique_id.isdigit() or len(unique_id) < 4 or len(unique_id) > 8:
+            errors.append({'line': line, 'error': 'Unique ID must be 4-8 digits only'})
+        elif not password or len(password) != 8:
+            errors.append({'line': line, 'error': 'Password must be exactly 8 characters'})
+        elif not row['name'] or not row['email']:
+            errors.append({'line': line, 'error': 'Name and email are required'})
+        elif unique_id in seen_ids:
+            errors.append({'line': line, 'error': 'Unique ID appears more than once in the file'})
+        elif row['email'] in seen_emails:
+            errors.append({'line': line, 'error': 'Email appears more than once in the file'})
+        else:
+            seen_ids.add(unique_id)
+            seen_emails.add(row['email'])
+            candidates.append((line, row))
+
+    # One set-based check against the users table for the whole file
+    existing_ids, existing_emails = find_existing_users(seen_ids, seen_emails)
+    valid = []
+    for line, row in candidates:
+        if row['unique_id'] in existing_ids:
+            errors.append({'line': line, 'error': 'Unique ID already exists'})
+        elif row['email'] in existing_emails:
+            errors.append({'line': line, 'error': 'Email already exists'})
+        else:
+            valid.append(row)
+    errors.sort(key=lambda e: e['line'])
+    return valid, errors
+
+
+def import_users(text, workers=None):
+    """Validate, hash and insert every user in a CSV document."""
+    rows = parse_rows(text)
+    valid, errors = validate_rows(rows)
+
+    workers = workers or os.cpu_count() or 1
+    passwords = [row['password'] for row in valid]
+    with timer('bcrypt'):
+        if workers > 1 and len(passwords) > 1:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                hashes = list(executor.map(_hash_password, passwords,
+                                           chunksize=max(1, len(passwords) // (workers * 4))))
+        else:
+            hashes = [_hash_password(p) for p in passwords]
+
+    created_at = datetime.now().isoformat()
+    users = [
+        {
+            'unique_id': row['unique_id'],
+            'name': row['name'],
+            'email': row['email'],
+            'password_hash': password_hash,
+            'role': row['role'],
+            'department': row['department'],
+            'created_at': created_at
+        }
+        for row, password_hash in zip(valid, hashes)
+    ]
+
+    created = 0
+    for start in range(0, len(users), INSERT_BATCH_SIZE):
+        batch = users[start:start + INSERT_BATCH_SIZE]
+        inserted = insert_users(batch)
+        if len(inserted) != len(batch):
+            errors.append({'line': None, 'error': f'Failed to insert users {start + 1}-{start + len(batch)} of the valid rows'})
+        created += len(inserted)
+
+    return {'rows': len(rows), 'created': created, 'errors': errors}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else None
+    print("Global Web Work - Bulk user import")
+    print("=" * 50)
+    with open(sys.argv[1], newline='', encoding='utf-8') as f:
+        result = import_users(f.read(), workers=workers)
+    for error in result['errors']:
+        print(f"✗ Line {error['line']}: {error['error']}")
+    print(f"✓ Created {result['created']} of {result['rows']} users")
@@ -0,0 +1,97 @@
+"""
+Keeping the in-process indexes current across worker processes.
+
+Each worker holds its own indexes (search, task store, duplicates, dependency
+graph, workload), updated directly by the routes it serves. ChangeFeed
+catches an index up with other workers' writes: it reads the rows whose
+timestamp column reached the newest value already seen. That watermark is
+always a database timestamp taken from rows actually received. It moves only
+once a read has succeeded, and reads start SYNC_OVERLAP_SECONDS behind it for
+transactions that committed after a later one. A full load takes its
+watermark before reading its first page, so writes racing the load are caught
+by the next read.
+
+Refresher rebuilds an index in a background thread once it is older than
+its refresh period, so requests keep using the old one meanwhile.
+"""
+
+import threading
+import time
+
+from supabase_client import newest_timestamp, sync_since
+
+
+class ChangeFeed:
+    def __init__(self, fetch, newest, interval, column='updated_at'):
+        """``fetch(since)`` returns rows changed at or after an ISO timestamp (all rows for None);
+        ``newest()`` returns the newest ``column`` value in the table now.
+        """
+        self._fetch = fetch
+        self._newest = newest
+        self.interval = interval
+        self.column = column
+        self._lock = threading.Lock()
+        self._polled_at = None      # monotonic time of the last read; None until a load finished
+        self.watermark = None       # newest value seen (database clock)
+
+    def mark(self):
+        """The watermark for a full load: call before reading its first page."""
+        return self._newest()
+
+    def loaded(self, watermark):
+        """A full load that started at ``mark()`` finished; the next read is due in ``interval``."""
+        with self._lock:
+            self._polled_at = time.monotonic()
+            self.watermark = watermark
+
+    def poll(self):
+        """Rows changed since the watermark, or None if nothing is loaded yet or a read is not due.
+
+        Errors propagate. Pass the rows to advance() once they are applied.
+        """
+        with self._lock:
+            if self._polled_at is None or time.monotonic() - self._polled_at < self.interval:
+                return None
+            self._polled_at = time.monotonic()
+            since = sync_since(self.watermark)
+        return self._fetch(since)
+
+    def advance(self, rows):
+        """Move the watermark to the newest of ``rows`` (from poll()) if it is later."""
+        with self._lock:
+            self.watermark = newest_timestamp(rows, self.column, newest=self.watermark)
+
+
+class Refresher:
+    def __init__(self, rebuild, max_age, name):
+        """Runs ``rebuild()`` in a thread called ``name``-refresh; ``name`` also labels errors."""
+        self._rebuild = rebuild
+        self.max_age = max_age
+        self.name = name
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start_if_stale(self, built_at, build_missing=True):
+        """Start a rebuild if the last one (monotonic ``built_at``) is too old; returns whether it did.
+
+        With ``build_missing`` an index that was never built counts as stale.
+        """
+        if built_at is None:
+            stale = build_missing
+        else:
+            stale = time.monotonic() - built_at > self.max_age
+        with self._lock:
+            if not stale or self._running:
+                return False
+            self._running = True
+
+        def run():
+            try:
+                self._rebuild()
+            except Exception as e:
+                print(f'Error rebuilding {self.name}: {e}')
+            finally:
+                self._running = False
+
+        threading.Thread(target=run, name=f"{self.name.replace(' ', '-')}-refresh", daemon=True).start()
+        return True
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for the Global Web Work database.
+
+Migrations live in migrations/ as NNNN_description.sql and are applied in
+version order. Every statement is written to be idempotent (IF NOT EXISTS,
+CREATE OR REPLACE, DROP ... IF EXISTS), so the runner is also safe against a
+database that was created by pasting setup_db.py's SQL by hand. Applied
+versions are recorded in the schema_migrations table together with a
+checksum of the file, and an advisory lock keeps two deploys from migrating
+at the same time.
+
+The runner needs a direct Postgres connection (Supabase: Project Settings →
+Database → Connection string), not the REST key used by the app.
+
+Usage:
+    DATABASE_URL="postgresql://..." python migrate.py status
+    DATABASE_URL="postgresql://..." python migrate.py up
+    python migrate.py sql            # print every migration for the SQL editor
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from collections import namedtuple
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+# Arbitrary constant shared by every runner for pg_advisory_lock
+ADVISORY_LOCK_ID = 7240513
+
+_FILENAME_RE = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+Migration = namedtuple('Migration', 'version name sql checksum')
+
+SCHEMA_MIGRATIONS_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+  version VARCHAR(4) PRIMARY KEY,
+  name VARCHAR(255) NOT NULL,
+  checksum VARCHAR(64) NOT NULL,
+  applied_at TIMESTAMP DEFAULT NOW()
+);
+"""
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Read every migration file, ordered by version."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME_RE.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(directory, filename), encoding='utf-8') as f:
+            sql = f.read()
+        migrations.append(Migration(
+            version=match.group(1),
+            name=match.group(2),
+            sql=sql,
+            checksum=hashlib.sha256(sql.encode('utf-8')).hexdigest()
+        ))
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f'Duplicate migration versions in {directory}')
+    return migrations
+
+
+def split_statements(sql):
+    """Split SQL into statements on `;`, ignoring comments and $$-quoted bodies."""
+    statements, current, in_body = [], [], False
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not in_body and (not stripped or stripped.startswith('--')):
+            continue
+        current.append(line)
+        if stripped.count('$$') % 2:
+            in_body = not in_body
+        if not in_body and stripped.endswith(';'):
+            statements.append('\n'.join(current).strip().rstrip(';'))
+            current = []
+    if current:
+        statements.append('\n'.join(current).strip().rstrip(';'))
+    return statements
+
+
+def render_sql(migrations=None):
+    """All migrations as one script, recording each version as it goes."""
+    migrations = migrations if migrations is not None else load_migrations()
+    parts = [SCHEMA_MIGRATIONS_SQL.strip()]
+    for migration in migrations:
+        parts.append(f'-- Migration {migration.version}_{migration.name}\n{migration.sql.strip()}')
+        parts.append(
+            "INSERT INTO schema_migrations (version, name, checksum) "
+            f"VALUES ('{migration.version}', '{migration.name}', '{migration.checksum}') "
+            "ON CONFLICT (version) DO NOTHING;"
+        )
+    return '\n\n'.join(parts) + '\n'
+
+
+def connect(database_url=None):
+    """Open a psycopg2 connection to DATABASE_URL."""
+    import psycopg2
+
+    database_url = database_url or os.environ.get('DATABASE_URL')
+    if not database_url:
+        raise RuntimeError('DATABASE_URL is not set')
+    return psycopg2.connect(database_url)
+
+
+def applied_migrations(conn):
+    """Return {version: checksum} of migrations recorded in the database."""
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA_MIGRATIONS_SQL)
+        cur.execute('SELECT version, checksum FROM schema_migrations')
+        rows = dict(cur.fetchall())
+    conn.commit()
+    return rows
+
+
+def pending_migrations(conn, migrations=None):
+    """Migrations not yet applied, plus versions whose file changed since it was applied."""
+    migrations = migrations if migrations is not None else load_migrations()
+    applied = applied_migrations(conn)
+    pending = [m for m in migrations if m.version not in applied]
+    changed = [m.version for m in migrations if m.version in applied and applied[m.version] != m.checksum]
+    return pending, changed
+
+
+def migrate(conn, migrations=None, target=None):
+    """Apply pending migrations up to ``target`` (inclusive), each in its own transaction."""
+    migrations = migrations if migrations is not None else load_migrations()
+    with conn.cursor() as cur:
+        cur.execute('SELECT pg_advisory_lock(%s)', (ADVISORY_LOCK_ID,))
+    try:
+        pending, _ = pending_migrations(conn, migrations)
+        applied = []
+        for migration in pending:
+            if target is not None and migration.version > target:
+                break
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(migration.sql)
+                    cur.execute(
+                        'INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)',
+                        (migration.version, migration.name, migration.checksum)
+                    )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied.append(migration.version)
+        return applied
+    finally:
+        with conn.cursor() as cur:
+            cur.execute('SELECT pg_advisory_unlock(%s)', (ADVISORY_LOCK_ID,))
+        conn.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply versioned schema migrations.')
+    parser.add_argument('command', choices=['status', 'up', 'sql'])
+    parser.add_argument('--database-url', help='Defaults to $DATABASE_URL')
+    parser.add_argument('--target', help='Stop after this version (e.g. 0004)')
+    args = parser.parse_args(argv)
+
+    migrations = load_migrations()
+    if args.command == 'sql':
+        print(render_sql(migrations))
+        return 0
+
+    print("Global Web Work - Schema migrations")
+    print("=" * 50)
+    conn = connect(args.database_url)
+    try:
+        pending, changed = pending_migrations(conn, migrations)
+        for version in changed:
+            print(f"✗ Migration {version} was edited after it was applied; add a new migration instead")
+
+        if args.command == 'status':
+            for migration in migrations:
+                mark = '·' if migration in pending else '✓'
+                print(f"{mark} {migration.version}_{migration.name}")
+            print(f"{len(pending)} pending")
+        else:
+            applied = migrate(conn, migrations, target=args.target)
+            for version in applied:
+                print(f"✓ Applied {version}")
+            print(f"Database is at version {max(applied_migrations(conn), default='none')}")
+    finally:
+        conn.close()
+    return 1 if changed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
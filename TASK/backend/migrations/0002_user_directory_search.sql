@@ -0,0 +1,6 @@
+-- Trigram indexes back case-insensitive prefix search in the user directory
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_users_name_trgm ON users USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_email_trgm ON users USING gin (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_department_trgm ON users USING gin (department gin_trgm_ops);
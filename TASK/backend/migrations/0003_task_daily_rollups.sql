@@ -0,0 +1,34 @@
+-- Daily analytics rollups (one row per day and department)
+
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS completed_at TIMESTAMP;
+
+CREATE TABLE IF NOT EXISTS task_daily_rollups (
+  bucket_date DATE NOT NULL,
+  department VARCHAR(100) NOT NULL DEFAULT 'General',
+  created_count INT NOT NULL DEFAULT 0,
+  completed_count INT NOT NULL DEFAULT 0,
+  timed_count INT NOT NULL DEFAULT 0,
+  predicted_hours_sum FLOAT NOT NULL DEFAULT 0,
+  actual_hours_sum FLOAT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT NOW(),
+  PRIMARY KEY (bucket_date, department)
+);
+
+-- Atomically add deltas to a rollup bucket (called by the backend on task changes)
+CREATE OR REPLACE FUNCTION increment_task_rollup(
+  p_bucket_date DATE, p_department TEXT, p_created INT, p_completed INT, p_timed INT,
+  p_predicted_hours FLOAT, p_actual_hours FLOAT
+) RETURNS void AS $$
+  INSERT INTO task_daily_rollups AS r (bucket_date, department, created_count, completed_count,
+                                       timed_count, predicted_hours_sum, actual_hours_sum)
+  VALUES (p_bucket_date, p_department, p_created, p_completed, p_timed, p_predicted_hours, p_actual_hours)
+  ON CONFLICT (bucket_date, department) DO UPDATE SET
+    created_count = r.created_count + EXCLUDED.created_count,
+    completed_count = r.completed_count + EXCLUDED.completed_count,
+    timed_count = r.timed_count + EXCLUDED.timed_count,
+    predicted_hours_sum = r.predicted_hours_sum + EXCLUDED.predicted_hours_sum,
+    actual_hours_sum = r.actual_hours_sum + EXCLUDED.actual_hours_sum,
+    updated_at = NOW();
+$$ LANGUAGE sql;
+
+ALTER TABLE task_daily_rollups DISABLE ROW LEVEL SECURITY;
@@ -0,0 +1,10 @@
+-- Precomputed AI suggestions (one row per user, refreshed by suggestions.py)
+
+CREATE TABLE IF NOT EXISTS ai_suggestions (
+  user_id VARCHAR(255) PRIMARY KEY,
+  suggestions JSONB NOT NULL DEFAULT '[]',
+  open_tasks INT DEFAULT 0,
+  computed_at TIMESTAMP DEFAULT NOW()
+);
+
+ALTER TABLE ai_suggestions DISABLE ROW LEVEL SECURITY;
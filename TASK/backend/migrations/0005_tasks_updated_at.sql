@@ -0,0 +1,3 @@
+-- Catch-up syncs of the search index read tasks by updated_at
+
+CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON tasks(updated_at);
@@ -0,0 +1,13 @@
+-- Composite indexes matching how tasks are actually read:
+--   open tasks per assignee (assigned_to, status, due_date)
+--   department dashboards and exports (department, status)
+--   a user's own tasks, newest first (created_by, created_at)
+-- The single-column assigned_to/created_by indexes are prefixes of the new
+-- ones, so they are dropped to save a write per task insert/update.
+
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_status_due ON tasks(assigned_to, status, due_date);
+CREATE INDEX IF NOT EXISTS idx_tasks_department_status ON tasks(department, status);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_by_created_at ON tasks(created_by, created_at);
+
+DROP INDEX IF EXISTS idx_tasks_assigned_to;
+DROP INDEX IF EXISTS idx_tasks_created_by;
@@ -0,0 +1,28 @@
+-- Incremental priority re-scoring (see priority.py)
+-- next_rescore_at is when the task's score next crosses a label threshold;
+-- NULL once it is High or completed. Open tasks start due so the first run
+-- scores them all once.
+
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS next_rescore_at TIMESTAMP;
+
+UPDATE tasks SET next_rescore_at = NOW()
+WHERE next_rescore_at IS NULL AND status <> 'completed' AND due_date IS NOT NULL
+  AND ai_priority_score IS DISTINCT FROM 'High';
+
+CREATE INDEX IF NOT EXISTS idx_tasks_next_rescore_at ON tasks(next_rescore_at) WHERE next_rescore_at IS NOT NULL;
+
+-- Apply one batch of re-scored tasks in a single statement. `priority` only
+-- follows the AI score while nobody has overridden it by hand.
+CREATE OR REPLACE FUNCTION apply_priority_rescores(p_rows JSONB) RETURNS INT AS $$
+  WITH updated AS (
+    UPDATE tasks AS t SET
+      priority = CASE WHEN t.priority IS NOT DISTINCT FROM t.ai_priority_score THEN r.ai_priority_score ELSE t.priority END,
+      ai_priority_score = r.ai_priority_score,
+      next_rescore_at = r.next_rescore_at,
+      updated_at = CASE WHEN t.ai_priority_score IS DISTINCT FROM r.ai_priority_score THEN NOW() ELSE t.updated_at END
+    FROM jsonb_to_recordset(p_rows) AS r(id UUID, ai_priority_score VARCHAR(50), next_rescore_at TIMESTAMP)
+    WHERE t.id = r.id
+    RETURNING 1
+  )
+  SELECT COUNT(*)::INT FROM updated;
+$$ LANGUAGE sql;
@@ -0,0 +1,43 @@
+-- Task dependencies (see dependencies.py): task_id cannot finish before
+-- depends_on does. Each worker keeps the graph in memory and rejects cycles
+-- there; the trigger below also rejects them in the database, where two
+-- workers adding opposite edges at the same time would otherwise both succeed.
+
+CREATE TABLE IF NOT EXISTS task_dependencies (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  task_id UUID NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+  depends_on UUID NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+  created_by VARCHAR(255),
+  created_at TIMESTAMP DEFAULT NOW(),
+  UNIQUE (task_id, depends_on),
+  CHECK (task_id <> depends_on)
+);
+
+-- (task_id, depends_on) is covered by the unique constraint; these serve
+-- "what does this task block" lookups and the workers' catch-up sync
+CREATE INDEX IF NOT EXISTS idx_task_dependencies_depends_on ON task_dependencies(depends_on);
+CREATE INDEX IF NOT EXISTS idx_task_dependencies_created_at ON task_dependencies(created_at);
+
+CREATE OR REPLACE FUNCTION task_dependencies_reject_cycle() RETURNS TRIGGER AS $$
+BEGIN
+  -- Serialize dependency inserts so concurrent ones see each other
+  PERFORM pg_advisory_xact_lock(hashtext('task_dependencies'));
+  IF EXISTS (
+    WITH RECURSIVE upstream(id) AS (
+      SELECT NEW.depends_on
+      UNION
+      SELECT d.depends_on FROM task_dependencies d JOIN upstream u ON d.task_id = u.id
+    )
+    SELECT 1 FROM upstream WHERE id = NEW.task_id
+  ) THEN
+    RAISE EXCEPTION 'dependency of % on % would create a cycle', NEW.task_id, NEW.depends_on;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS task_dependencies_no_cycle ON task_dependencies;
+CREATE TRIGGER task_dependencies_no_cycle BEFORE INSERT ON task_dependencies
+  FOR EACH ROW EXECUTE FUNCTION task_dependencies_reject_cycle();
+
+ALTER TABLE task_dependencies DISABLE ROW LEVEL SECURITY;
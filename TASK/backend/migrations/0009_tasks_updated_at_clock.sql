@@ -0,0 +1,17 @@
+-- Catch-up syncs compare updated_at with the newest value they have seen, so
+-- every value must come from the database clock. Writes that move updated_at
+-- (the task update route sends its own timestamp) get NOW() instead; writes
+-- that leave it alone, like unchanged rows in apply_priority_rescores, keep it.
+
+CREATE OR REPLACE FUNCTION tasks_stamp_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.updated_at IS DISTINCT FROM OLD.updated_at THEN
+    NEW.updated_at := NOW();
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tasks_updated_at_clock ON tasks;
+CREATE TRIGGER tasks_updated_at_clock BEFORE UPDATE ON tasks
+  FOR EACH ROW EXECUTE FUNCTION tasks_stamp_updated_at();
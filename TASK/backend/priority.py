@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Task priority scoring and incremental re-scoring as deadlines approach.
+
+The score only grows as a task's due date nears, so when a task is scored we
+already know the moment it will next cross a label threshold (Medium at 5,
+High at 8). That moment is stored in the indexed tasks.next_rescore_at
+column. Each run reads only tasks whose crossing time has passed, re-scores
+them in one vectorized batch and writes the batch back with a single RPC.
+Work per run is proportional to the tasks that change label, not to the
+number of open tasks. Runs that are missed catch up on the next one.
+
+When the API server runs the job in-process, only one worker process per host
+does so: the first to take an fcntl lock on RESCORE_LOCK_FILE keeps it for
+its lifetime, and if that worker exits another one takes over on its next
+tick. Without fcntl (Windows) every process runs the job.
+
+Usage:
+    python priority.py rescore [--batch-size N]
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no cross-process lock, every process re-scores
+    fcntl = None
+
+# Load environment variables from .env file
+load_dotenv()
+
+from supabase_client import get_tasks_due_for_rescore, apply_priority_rescores
+from rollups import parse_timestamp
+
+URGENCY_WEIGHT = 0.4
+COMPLEXITY_WEIGHT = 0.3
+DEADLINE_WEIGHT = 0.3
+DEADLINE_HORIZON_DAYS = 10
+# (minimum score, label), highest first
+THRESHOLDS = [(8, 'High'), (5, 'Medium')]
+TASK_COLUMNS = 'id,urgency,complexity,due_date,status,ai_priority_score'
+BATCH_SIZE = 500
+RESCORE_LOCK_FILE = os.environ.get('RESCORE_LOCK_FILE') or os.path.join(tempfile.gettempdir(), 'gww-rescore.lock')
+
+_runner_fd = None
+
+
+def priority_scores(urgency, complexity, deadline_days):
+    """Vectorized priority score for arrays of urgency, complexity and days to deadline."""
+    urgency = np.asarray(urgency, dtype=np.float64)
+    complexity = np.asarray(complexity, dtype=np.float64)
+    deadline_days = np.asarray(deadline_days, dtype=np.float64)
+    return (urgency * URGENCY_WEIGHT + complexity * COMPLEXITY_WEIGHT
+            + np.maximum(0, DEADLINE_HORIZON_DAYS - deadline_days) * DEADLINE_WEIGHT)
+
+
+def priority_labels(scores):
+    """Map scores to 'High' / 'Medium' / 'Low'."""
+    scores = np.asarray(scores)
+    return np.select([scores >= minimum for minimum, _ in THRESHOLDS],
+                     [label for _, label in THRESHOLDS], default='Low')
+
+
+def predict_priority(urgency, complexity, deadline_days):
+    """Label for a single task."""
+    return str(priority_labels(priority_scores([urgency], [complexity], [deadline_days]))[0])
+
+
+def deadline_days(due_date, now):
+    """Whole days from ``now`` to the due date, as used at task creation."""
+    return (due_date - now).days
+
+
+def next_rescore_at(urgency, complexity, due_date, now=None):
+    """When the task's label next changes (naive ISO timestamp), or None if it never will.
+
+    Finds the largest whole number of days-to-deadline at which the score
+    reaches the next threshold; `deadline_days` drops to that value once less
+    than that many days plus one remain.
+    """
+    due = parse_timestamp(due_date) if isinstance(due_date, str) else due_date
+    if due is None:
+        return None
+    now = now or datetime.now()
+    score = float(priority_scores([urgency], [complexity], [deadline_days(due, now)])[0])
+    upcoming = [minimum for minimum, _ in THRESHOLDS if minimum > score]
+    if not upcoming:
+        return None
+    target = min(upcoming)
+
+    def reaches(days):
+        return float(priority_scores([urgency], [complexity], [days])[0]) >= target
+
+    base = urgency * URGENCY_WEIGHT + complexity * COMPLEXITY_WEIGHT
+    days = int(np.floor(DEADLINE_HORIZON_DAYS - (target - base) / DEADLINE_WEIGHT))
+    # Guard against float rounding at the boundary
+    while not reaches(days):
+        days -= 1
+    while reaches(days + 1):
+        days += 1
+    # One second past the boundary: at the boundary itself the label has not changed yet
+    return (due - timedelta(days=days + 1, seconds=-1)).isoformat()
+
+
+def rescore_batch(tasks, now):
+    """Re-score a batch of due tasks; returns the rows to write back."""
+    open_tasks = [t for t in tasks if t.get('status') != 'completed' and parse_timestamp(t.get('due_date'))]
+    open_ids = {t['id'] for t in open_tasks}
+    # Completed or undated tasks just leave the schedule
+    rows = [
+        {'id': t['id'], 'ai_priority_score': t.get('ai_priority_score'), 'next_rescore_at': None}
+        for t in tasks if t['id'] not in open_ids
+    ]
+    if not open_tasks:
+        return rows
+
+    urgency = [t.get('urgency') if t.get('urgency') is not None else 5 for t in open_tasks]
+    complexity = [t.get('complexity') if t.get('complexity') is not None else 5 for t in open_tasks]
+    days = [deadline_days(parse_timestamp(t['due_date']), now) for t in open_tasks]
+    labels = priority_labels(priority_scores(urgency, complexity, days))
+    for task, label, u, c in zip(open_tasks, labels, urgency, complexity):
+        rows.append({
+            'id': task['id'],
+            'ai_priority_score': str(label),
+            'next_rescore_at': next_rescore_at(u, c, task['due_date'], now)
+        })
+    return rows
+
+
+def rescore_due(now=None, batch_size=BATCH_SIZE):
+    """Re-score every task whose threshold crossing has passed, one batch at a time."""
+    now = now or datetime.now()
+    rescored = changed = batches = 0
+    while True:
+        tasks = get_tasks_due_for_rescore(now.isoformat(), TASK_COLUMNS, limit=batch_size)
+        if not tasks:
+            break
+        rows = rescore_batch(tasks, now)
+        apply_priority_rescores(rows)
+        previous = {t['id']: t.get('ai_priority_score') for t in tasks}
+        changed += sum(1 for row in rows if row['ai_priority_score'] != previous[row['id']])
+        rescored += len(rows)
+        batches += 1
+        if len(tasks) < batch_size:
+            break
+    return {'rescored': rescored, 'changed': changed, 'batches': batches}
+
+
+def claim_rescore_runner():
+    """True if this process is (or just became) the host's re-scoring runner.
+
+    The lock is never released explicitly; the OS drops it when the process exits.
+    """
+    global _runner_fd
+    if _runner_fd is not None or fcntl is None:
+        return True
+    fd = os.open(RESCORE_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    _runner_fd = fd
+    return True
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'rescore':
+        print(__doc__)
+        sys.exit(1)
+    batch_size = int(sys.argv[sys.argv.index('--batch-size') + 1]) if '--batch-size' in sys.argv else BATCH_SIZE
+    print("Global Web Work - Priority re-scoring")
+    print("=" * 50)
+    result = rescore_due(batch_size=batch_size)
+    print(f"✓ Re-scored {result['rescored']} tasks, {result['changed']} changed priority ({result['batches']} batches)")
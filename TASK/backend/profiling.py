@@ -0,0 +1,198 @@
+"""
+Opt-in request profiling.
+
+A request is profiled when an admin sends `X-Profile: 1` or when it is picked
+by PROFILE_SAMPLE_RATE. While a request is profiled, functions decorated with
+`timed(category)` add their wall time to its breakdown: Supabase helpers,
+JSON serialization, bcrypt and the predictors. The request also runs under
+cProfile when no other request is using it.
+
+Each profiled request leaves a JSON record (and a .prof file for pstats or
+snakeviz) in PROFILE_DIR. Only the newest PROFILE_KEEP requests are kept, and
+records from every worker land in the same directory. Requests that are not
+profiled pay one thread-local lookup per timed call.
+"""
+
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '200'))
+TOP_FUNCTIONS = 15
+
+_state = threading.local()
+# cProfile allows one active profiler per process on newer Pythons
+_cprofile_lock = threading.Lock()
+
+
+def should_sample():
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+
+def start(method, path, user_id=None, reason='sampled'):
+    """Begin profiling the current request."""
+    profiler = None
+    if _cprofile_lock.acquire(blocking=False):
+        profiler = cProfile.Profile()
+        profiler.enable()
+    _state.record = {
+        'id': f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}",
+        'method': method,
+        'path': path,
+        'user_id': user_id,
+        'reason': reason,
+        'started_at': datetime.now().isoformat(),
+        'started': time.perf_counter(),
+        'breakdown': defaultdict(lambda: {'ms': 0.0, 'calls': 0})
+    }
+    _state.profiler = profiler
+
+
+def active():
+    return getattr(_state, 'record', None) is not None
+
+
+def finish(status):
+    """Stop profiling, write the record (and .prof) and return the record id."""
+    record = getattr(_state, 'record', None)
+    profiler = getattr(_state, 'profiler', None)
+    _state.record = None
+    _state.profiler = None
+    if record is None:
+        return None
+
+    if profiler is not None:
+        profiler.disable()
+        _cprofile_lock.release()
+    record['duration_ms'] = round((time.perf_counter() - record.pop('started')) * 1000, 2)
+    record['status'] = status
+    record['breakdown'] = {
+        category: {'ms': round(entry['ms'], 2), 'calls': entry['calls']}
+        for category, entry in sorted(record['breakdown'].items(), key=lambda item: -item[1]['ms'])
+    }
+    accounted = sum(entry['ms'] for entry in record['breakdown'].values())
+    record['breakdown']['other'] = {'ms': round(max(0.0, record['duration_ms'] - accounted), 2), 'calls': 0}
+
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if profiler is not None:
+            profile_path = os.path.join(PROFILE_DIR, record['id'] + '.prof')
+            profiler.dump_stats(profile_path)
+            record['profile'] = os.path.basename(profile_path)
+            record['top_functions'] = _top_functions(profiler)
+        with open(os.path.join(PROFILE_DIR, record['id'] + '.json'), 'w', encoding='utf-8') as f:
+            json.dump(record, f)
+        _rotate()
+    except OSError as e:
+        print(f'Error writing profile: {e}')
+    return record['id']
+
+
+def _top_functions(profiler):
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:TOP_FUNCTIONS]
+    return [
+        {
+            'function': f'{os.path.basename(filename)}:{line}({name})',
+            'calls': calls,
+            'cumulative_ms': round(cumulative * 1000, 2)
+        }
+        for (filename, line, name), (_, calls, _, cumulative, _) in rows
+    ]
+
+
+def _rotate():
+    records = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith('.json'))
+    for name in records[:max(0, len(records) - PROFILE_KEEP)]:
+        for extension in ('.json', '.prof'):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, name[:-len('.json')] + extension))
+            except FileNotFoundError:
+                pass
+
+
+def slowest(limit=20):
+    """The slowest profiled requests still on disk, slowest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    records = []
+    for name in os.listdir(PROFILE_DIR):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(PROFILE_DIR, name), encoding='utf-8') as f:
+                records.append(json.load(f))
+        except (OSError, ValueError):
+            continue    # rotated away or still being written by another worker
+    records.sort(key=lambda record: -record.get('duration_ms', 0))
+    return records[:limit]
+
+
+def _add(category, started):
+    record = getattr(_state, 'record', None)
+    if record is not None:
+        entry = record['breakdown'][category]
+        entry['ms'] += (time.perf_counter() - started) * 1000
+        entry['calls'] += 1
+
+
+@contextmanager
+def timer(category):
+    """Add the wall time of a block to the current request's breakdown."""
+    if not active():
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add(category, started)
+
+
+def timed(category=None):
+    """Decorator form of timer(); the category defaults to the function name.
+
+    For generator functions the time spent producing each item is counted,
+    not the time the caller spends between items.
+    """
+    def decorate(fn):
+        name = category or fn.__name__
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                iterator = fn(*args, **kwargs)
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        _add(name, started)
+                        return
+                    _add(name, started)
+                    yield item
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not active():
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _add(name, started)
+        return wrapper
+    return decorate
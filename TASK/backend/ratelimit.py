@@ -0,0 +1,157 @@
+"""
+Per-user and per-IP rate limiting and load shedding.
+
+Every request is charged a route-specific cost against two token buckets:
+one per client IP and, when it carries a valid token, one per user. A bucket
+holds up to ``burst`` tokens and refills at ``rate`` tokens per second. A
+request that cannot pay is turned away with the number of seconds until it
+could, before anything touches Supabase.
+
+The buckets live in a memory-mapped file (RATE_LIMIT_FILE) of fixed-size
+slots. Every worker process on the host maps the same file, so the limits
+hold across workers without an outside service. A key is hashed to one slot
+and the slot is locked with an fcntl byte-range lock while it is updated, so
+workers only wait for each other on the same slot. If two keys land in the
+same slot, the newer one takes it over with a full bucket; with the default
+65536 slots this is rare and only ever errs on the side of letting a request
+through. Without fcntl (Windows) the file is still shared but is only locked
+within each process.
+
+LoadShedder caps the total cost of the requests a worker is serving at once,
+so a burst of expensive requests gets a quick 503 instead of queueing behind
+each other.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: slots are still shared through the file, but only locked per process
+    fcntl = None
+
+ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') != '0'
+RATE_LIMIT_FILE = os.environ.get('RATE_LIMIT_FILE') or os.path.join(tempfile.gettempdir(), 'gww-rate-limit.bin')
+RATE_LIMIT_SLOTS = int(os.environ.get('RATE_LIMIT_SLOTS', '65536'))
+USER_RATE = float(os.environ.get('RATE_LIMIT_USER_RATE', '2'))
+USER_BURST = float(os.environ.get('RATE_LIMIT_USER_BURST', '60'))
+IP_RATE = float(os.environ.get('RATE_LIMIT_IP_RATE', '20'))
+IP_BURST = float(os.environ.get('RATE_LIMIT_IP_BURST', '300'))
+MAX_INFLIGHT_COST = int(os.environ.get('SHED_MAX_INFLIGHT_COST', '400'))
+
+# key hash, tokens, last refill (epoch seconds: comparable across processes)
+_SLOT = struct.Struct('<Qdd')
+_THREAD_LOCK_STRIPES = 64
+
+
+def _key_hash(key):
+    # Never 0, so an empty slot never matches a key
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+
+class SharedTokenBuckets:
+    """Token buckets in a memory-mapped file shared by every worker on the host."""
+
+    def __init__(self, path=RATE_LIMIT_FILE, slots=RATE_LIMIT_SLOTS):
+        self.path = path
+        self.slots = slots
+        size = slots * _SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        # fcntl locks belong to the process, so threads also need their own
+        self._thread_locks = [threading.Lock() for _ in range(_THREAD_LOCK_STRIPES)]
+
+    def _update(self, key, change):
+        """Run ``change(tokens, elapsed, matched) -> (tokens, result)`` on a key's slot under its lock."""
+        digest = _key_hash(key)
+        offset = (digest % self.slots) * _SLOT.size
+        with self._thread_locks[digest % _THREAD_LOCK_STRIPES]:
+            if fcntl is not None:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, _SLOT.size, offset)
+            try:
+                stored, tokens, updated = _SLOT.unpack_from(self._map, offset)
+                now = time.time()
+                tokens, result = change(tokens, max(0.0, now - updated), stored == digest)
+                _SLOT.pack_into(self._map, offset, digest, tokens, now)
+            finally:
+                if fcntl is not None:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, _SLOT.size, offset)
+        return result
+
+    def take(self, key, cost, rate, burst):
+        """Take ``cost`` tokens; returns 0 if they were taken, else seconds until they would be."""
+        cost = min(cost, burst)
+
+        def change(tokens, elapsed, matched):
+            tokens = min(burst, tokens + elapsed * rate) if matched else burst
+            if tokens >= cost:
+                return tokens - cost, 0.0
+            return tokens, (cost - tokens) / rate
+
+        return self._update(key, change)
+
+    def give(self, key, amount, burst):
+        """Return tokens taken for a request that was turned away by another bucket."""
+        self._update(key, lambda tokens, elapsed, matched: (min(burst, tokens + amount) if matched else burst, None))
+
+
+class RateLimiter:
+    def __init__(self, path=RATE_LIMIT_FILE):
+        self.path = path
+        self._buckets = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _store(self):
+        # Opened lazily in each process: workers forked from a preloaded app must not share the parent's locks
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._buckets = SharedTokenBuckets(self.path)
+                    self._pid = os.getpid()
+        return self._buckets
+
+    def check(self, user_id, ip, cost):
+        """Charge a request to its IP bucket and, if signed in, its user bucket.
+
+        Returns 0 if the request may proceed, else whole seconds to wait (for Retry-After).
+        """
+        if not ENABLED or cost <= 0:
+            return 0
+        buckets = self._store()
+        wait = buckets.take(f'ip:{ip}', cost, IP_RATE, IP_BURST)
+        if not wait and user_id is not None:
+            wait = buckets.take(f'user:{user_id}', cost, USER_RATE, USER_BURST)
+            if wait:
+                buckets.give(f'ip:{ip}', cost, IP_BURST)
+        return max(1, math.ceil(wait)) if wait else 0
+
+
+class LoadShedder:
+    """Caps the total cost of the requests one worker serves at the same time."""
+
+    def __init__(self, max_cost=MAX_INFLIGHT_COST):
+        self.max_cost = max_cost
+        self.inflight = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, cost):
+        with self._lock:
+            # A lone request is always admitted, however expensive
+            if self.max_cost > 0 and self.inflight and self.inflight + cost > self.max_cost:
+                return False
+            self.inflight += cost
+            return True
+
+    def release(self, cost):
+        with self._lock:
+            self.inflight -= cost
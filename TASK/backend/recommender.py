@@ -0,0 +1,229 @@
+"""
+Workload-aware assignee recommendations.
+
+WorkloadIndex keeps, per employee, the predicted hours of their open tasks,
+how much of that is due soon (deadline pressure) and a learned efficiency
+factor from completed tasks. Each department has a heap keyed by effective
+load so the least-loaded candidates are found without scanning every user.
+The index is built once from Supabase and then updated incrementally by the
+task routes; a stale index is rebuilt in the background.
+"""
+
+import heapq
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from index_sync import Refresher
+from supabase_client import iter_tasks, list_users, MAX_ROWS
+from rollups import parse_timestamp, completion_hours
+
+# Open hours due within this many days count as deadline pressure
+PRESSURE_WINDOW_DAYS = 7
+PRESSURE_WEIGHT = 0.5
+WORK_HOURS_PER_DAY = 8
+# Completed tasks needed before a learned efficiency outweighs the neutral 1.0
+EFFICIENCY_PRIOR_TASKS = 5
+EFFICIENCY_BOUNDS = (0.5, 2.0)
+REFRESH_SECONDS = float(os.environ.get('RECOMMENDER_REFRESH_SECONDS', '300'))
+
+TASK_COLUMNS = 'id,assigned_to,status,due_date,predicted_completion_time,created_at,completed_at,updated_at'
+
+
+class WorkloadIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._refresher = Refresher(self.rebuild, REFRESH_SECONDS, 'workload index')
+        self._reset()
+
+    def _reset(self):
+        self.built_at = None
+        self._users = {}                          # unique_id -> {'name', 'department'}
+        self._open = defaultdict(dict)            # unique_id -> {task_id: (hours, due)}
+        self._task_owner = {}                     # open task_id -> unique_id
+        self._load = {}                           # unique_id -> (open_hours, urgent_hours)
+        self._completed = defaultdict(lambda: [0, 0.0, 0.0])  # unique_id -> [count, predicted, actual]
+        self._baseline = {}                       # department -> median predicted/actual ratio
+        self._efficiency = {}
+        self._heaps = defaultdict(list)           # department -> [(key, version, unique_id)]
+        self._versions = defaultdict(int)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def rebuild(self):
+        """Load users and tasks from Supabase and rebuild every structure."""
+        users = {}
+        cursor = None
+        while True:
+            page = list_users(['unique_id', 'name', 'department'], MAX_ROWS, after=cursor)
+            if not page:
+                break
+            for user in page:
+                users[user['unique_id']] = {'name': user.get('name'), 'department': user.get('department') or 'General'}
+            cursor = page[-1]['unique_id']
+
+        tasks = [task for page in iter_tasks(TASK_COLUMNS) for task in page]
+
+        with self._lock:
+            self._reset()
+            self._users = users
+            for task in tasks:
+                if task.get('status') == 'completed':
+                    self._add_completed(task)
+                else:
+                    self._add_open(task)
+            self._compute_baselines()
+            for unique_id in self._users:
+                self._refresh_user(unique_id)
+            self.built_at = time.monotonic()
+        return {'ok': True, 'users': len(users), 'tasks': len(tasks)}
+
+    def refresh_if_stale(self):
+        """Rebuild in a background thread when the index is older than REFRESH_SECONDS."""
+        return self._refresher.start_if_stale(self.built_at)
+
+    def _compute_baselines(self):
+        ratios = defaultdict(list)
+        for unique_id, (count, predicted, actual) in self._completed.items():
+            if count and actual > 0 and unique_id in self._users:
+                ratios[self._users[unique_id]['department']].append(predicted / actual)
+        self._baseline = {dept: sorted(values)[len(values) // 2] for dept, values in ratios.items()}
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    def _add_open(self, task):
+        assignee = task.get('assigned_to')
+        if not assignee:
+            return None
+        due = parse_timestamp(task.get('due_date'))
+        self._open[assignee][task['id']] = (float(task.get('predicted_completion_time') or 0.0), due)
+        self._task_owner[task['id']] = assignee
+        return assignee
+
+    def _remove_open(self, task_id):
+        assignee = self._task_owner.pop(task_id, None)
+        if assignee is not None:
+            self._open[assignee].pop(task_id, None)
+        return assignee
+
+    def _add_completed(self, task, sign=1):
+        assignee = task.get('assigned_to')
+        hours = completion_hours(task)
+        if not assignee or hours is None:
+            return assignee
+        stats = self._completed[assignee]
+        stats[0] += sign
+        stats[1] += sign * hours[0]
+        stats[2] += sign * hours[1]
+        return assignee
+
+    def _refresh_user(self, unique_id):
+        """Recompute one user's load, efficiency and heap entry."""
+        if unique_id not in self._users:
+            return
+        now = datetime.now()
+        soon = now + timedelta(days=PRESSURE_WINDOW_DAYS)
+        open_hours = urgent_hours = 0.0
+        for hours, due in self._open.get(unique_id, {}).values():
+            open_hours += hours
+            if due is not None and due <= soon:
+                urgent_hours += hours
+        self._load[unique_id] = (open_hours, urgent_hours)
+
+        department = self._users[unique_id]['department']
+        count, predicted, actual = self._completed.get(unique_id, (0, 0.0, 0.0))
+        baseline = self._baseline.get(department)
+        efficiency = 1.0
+        if count > 0 and actual > 0 and baseline:
+            learned = min(max((predicted / actual) / baseline, EFFICIENCY_BOUNDS[0]), EFFICIENCY_BOUNDS[1])
+            weight = count / (count + EFFICIENCY_PRIOR_TASKS)
+            efficiency = weight * learned + (1 - weight) * 1.0
+        self._efficiency[unique_id] = efficiency
+
+        self._versions[unique_id] += 1
+        key = (open_hours + PRESSURE_WEIGHT * urgent_hours) / efficiency
+        heap = self._heaps[department]
+        heapq.heappush(heap, (key, self._versions[unique_id], unique_id))
+        # Drop superseded entries once they dominate the heap
+        if len(heap) > 4 * max(16, len(self._users)):
+            self._heaps[department] = [e for e in heap if self._versions[e[2]] == e[1]]
+            heapq.heapify(self._heaps[department])
+
+    def task_added(self, task):
+        with self._lock:
+            if self.built_at is None or task.get('status') == 'completed':
+                return
+            assignee = self._add_open(task)
+            if assignee:
+                self._refresh_user(assignee)
+
+    def task_changed(self, previous, updated):
+        with self._lock:
+            if self.built_at is None:
+                return
+            touched = {self._remove_open(previous['id'])}
+            if previous.get('status') == 'completed':
+                touched.add(self._add_completed(previous, sign=-1))
+            if updated.get('status') == 'completed':
+                touched.add(self._add_completed(updated))
+            else:
+                touched.add(self._add_open(updated))
+            for unique_id in touched - {None}:
+                self._refresh_user(unique_id)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def efficiency(self, unique_id):
+        with self._lock:
+            return self._efficiency.get(unique_id, 1.0)
+
+    def recommend(self, department, task_hours, due_date=None, limit=5):
+        """Return up to ``limit`` members of ``department`` ranked by effective load.
+
+        ``due_date`` may be naive (local time) or carry an offset.
+        """
+        with self._lock:
+            heap = self._heaps.get(department or 'General', [])
+            picked = []
+            seen = set()
+            while heap and len(picked) < limit:
+                entry = heapq.heappop(heap)
+                key, version, unique_id = entry
+                if self._versions[unique_id] != version or unique_id in seen:
+                    continue
+                seen.add(unique_id)
+                picked.append(entry)
+            for entry in picked:
+                heapq.heappush(heap, entry)
+
+            available_hours = None
+            if due_date is not None:
+                # Compared as aware UTC: a naive due date is taken as local time, like datetime.now()
+                remaining = due_date.astimezone(timezone.utc) - datetime.now(timezone.utc)
+                available_hours = max(0.0, remaining.total_seconds() / 86400) * WORK_HOURS_PER_DAY
+
+            candidates = []
+            for key, _, unique_id in picked:
+                open_hours, urgent_hours = self._load[unique_id]
+                efficiency = self._efficiency[unique_id]
+                projected = (open_hours + task_hours) / efficiency
+                candidates.append({
+                    'unique_id': unique_id,
+                    'name': self._users[unique_id]['name'],
+                    'open_tasks': len(self._open.get(unique_id, {})),
+                    'open_hours': round(open_hours, 2),
+                    'deadline_pressure_hours': round(urgent_hours, 2),
+                    'efficiency': round(efficiency, 3),
+                    'score': round(key, 2),
+                    'projected_hours': round(projected, 2),
+                    'fits_deadline': None if available_hours is None else projected <= available_hours
+                })
+            return candidates
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Daily analytics rollups for the Global Web Work application.
+
+Each (day, department) bucket in `task_daily_rollups` holds counts of tasks
+created and completed that day plus predicted vs. actual hours for the
+completed ones. Buckets are kept current incrementally by the task routes;
+this script rebuilds them from the `tasks` table when needed.
+
+Usage:
+    python rollups.py backfill
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+from supabase_client import increment_task_rollup, upsert_task_rollups, iter_tasks, get_task_rollups
+
+ROLLUP_COLUMNS = ['created_count', 'completed_count', 'timed_count', 'predicted_hours_sum', 'actual_hours_sum']
+TASK_COLUMNS = 'id,department,status,created_at,completed_at,updated_at,predicted_completion_time'
+
+
+def parse_timestamp(value):
+    """Parse an ISO date or timestamp from Supabase into a naive datetime (None if invalid).
+
+    Values with an offset are converted to UTC first, as in compute_rollups.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def completion_hours(task):
+    """Return (predicted, actual) hours for a completed task, or None if either is unknown."""
+    created_at = parse_timestamp(task.get('created_at'))
+    completed_at = parse_timestamp(task.get('completed_at') or task.get('updated_at'))
+    predicted = task.get('predicted_completion_time')
+    if created_at is None or completed_at is None or predicted is None:
+        return None
+    actual = max(0.0, (completed_at - created_at).total_seconds() / 3600)
+    return float(predicted), actual
+
+
+def record_task_created(task):
+    """Count a newly created task in today's bucket for its department."""
+    created_at = parse_timestamp(task.get('created_at')) or datetime.now()
+    return increment_task_rollup(created_at.date().isoformat(), task.get('department') or 'General', created=1)
+
+
+def record_task_status_change(previous, updated):
+    """Move a task into (or back out of) the completed counts when its status changes."""
+    was_completed = previous.get('status') == 'completed'
+    is_completed = updated.get('status') == 'completed'
+    if was_completed == is_completed:
+        return True
+
+    # Reopening a task subtracts what was added when it was completed
+    task = updated if is_completed else previous
+    sign = 1 if is_completed else -1
+    completed_at = parse_timestamp(task.get('completed_at') or task.get('updated_at')) or datetime.now()
+    hours = completion_hours(task)
+    predicted, actual = hours if hours else (0.0, 0.0)
+    return increment_task_rollup(
+        completed_at.date().isoformat(),
+        task.get('department') or 'General',
+        completed=sign,
+        timed=sign if hours else 0,
+        predicted_hours=sign * predicted,
+        actual_hours=sign * actual
+    )
+
+
+def _to_utc(values):
+    # utc=True accepts offset and naive strings alike (mixed offsets fail without it); the offset is then dropped
+    return pd.to_datetime(values, errors='coerce', format='ISO8601', utc=True).dt.tz_localize(None)
+
+
+def compute_rollups(tasks):
+    """Group a batch of task rows into (bucket_date, department) sums with pandas."""
+    frame = pd.DataFrame(tasks, columns=TASK_COLUMNS.split(','))
+    if frame.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    frame['department'] = frame['department'].fillna('General')
+    created_at = _to_utc(frame['created_at'])
+
+    created = (
+        frame.assign(bucket_date=created_at.dt.date)
+        .dropna(subset=['bucket_date'])
+        .groupby(['bucket_date', 'department'])
+        .size()
+        .rename('created_count')
+    )
+
+    done = frame[frame['status'] == 'completed']
+    completed_at = _to_utc(done['completed_at'].fillna(done['updated_at']))
+    actual = ((completed_at - created_at[done.index]).dt.total_seconds() / 3600).clip(lower=0)
+    predicted = pd.to_numeric(done['predicted_completion_time'], errors='coerce')
+    timed = actual.notna() & predicted.notna()
+    completed = (
+        done.assign(
+            bucket_date=completed_at.dt.date,
+            timed_count=timed.astype(np.int64),
+            predicted_hours_sum=predicted.where(timed, 0.0),
+            actual_hours_sum=actual.where(timed, 0.0)
+        )
+        .dropna(subset=['bucket_date'])
+        .groupby(['bucket_date', 'department'])
+        .agg(
+            completed_count=('id', 'size'),
+            timed_count=('timed_count', 'sum'),
+            predicted_hours_sum=('predicted_hours_sum', 'sum'),
+            actual_hours_sum=('actual_hours_sum', 'sum')
+        )
+    )
+
+    return pd.concat([created, completed], axis=1).reindex(columns=ROLLUP_COLUMNS).fillna(0)
+
+
+def backfill(page_size=1000):
+    """Rebuild every bucket from the tasks table, one page of tasks at a time."""
+    totals = pd.DataFrame(columns=ROLLUP_COLUMNS)
+    scanned = 0
+    for page in iter_tasks(TASK_COLUMNS, page_size=page_size):
+        totals = totals.add(compute_rollups(page), fill_value=0) if not totals.empty else compute_rollups(page)
+        scanned += len(page)
+
+    rows = [
+        {
+            'bucket_date': bucket_date.isoformat(),
+            'department': department,
+            'created_count': int(values['created_count']),
+            'completed_count': int(values['completed_count']),
+            'timed_count': int(values['timed_count']),
+            'predicted_hours_sum': float(values['predicted_hours_sum']),
+            'actual_hours_sum': float(values['actual_hours_sum']),
+            'updated_at': datetime.now().isoformat()
+        }
+        for (bucket_date, department), values in totals.iterrows()
+    ]
+    for start in range(0, len(rows), 500):
+        upsert_task_rollups(rows[start:start + 500])
+    return {'tasks_scanned': scanned, 'buckets_written': len(rows)}
+
+
+def load_trends(start_date, end_date, granularity='day', department=None):
+    """Read buckets for a date range and resample them into a chart-ready series."""
+    rows = get_task_rollups(start_date.isoformat(), end_date.isoformat(), department)
+    frame = pd.DataFrame(rows, columns=['bucket_date', 'department'] + ROLLUP_COLUMNS)
+    frame[ROLLUP_COLUMNS] = frame[ROLLUP_COLUMNS].apply(pd.to_numeric, errors='coerce').fillna(0)
+    frame['bucket_date'] = pd.to_datetime(frame['bucket_date'])
+
+    # Weekly buckets start on Monday; missing days/weeks are reported as zeros
+    freq = 'W-MON' if granularity == 'week' else 'D'
+    if granularity == 'week':
+        frame['bucket_date'] = frame['bucket_date'].dt.to_period('W-SUN').dt.start_time
+        start_date = start_date - timedelta(days=start_date.weekday())
+    index = pd.date_range(pd.Timestamp(start_date), pd.Timestamp(end_date), freq=freq)
+
+    totals = frame.groupby('bucket_date')[ROLLUP_COLUMNS].sum().reindex(index, fill_value=0)
+    timed = totals['timed_count'].replace(0, np.nan)
+    series = [
+        {
+            'date': bucket.date().isoformat(),
+            'created': int(values['created_count']),
+            'completed': int(values['completed_count']),
+            'mean_predicted_hours': None if np.isnan(predicted) else round(float(predicted), 2),
+            'mean_actual_hours': None if np.isnan(actual) else round(float(actual), 2)
+        }
+        for (bucket, values), predicted, actual in zip(
+            totals.iterrows(),
+            (totals['predicted_hours_sum'] / timed).to_numpy(),
+            (totals['actual_hours_sum'] / timed).to_numpy()
+        )
+    ]
+
+    throughput = frame.pivot_table(
+        index='bucket_date', columns='department', values='completed_count', aggfunc='sum', fill_value=0
+    ).reindex(index, fill_value=0)
+    departments = {
+        dept: [{'date': bucket.date().isoformat(), 'completed': int(count)} for bucket, count in counts.items()]
+        for dept, counts in throughput.items()
+    }
+
+    return {
+        'granularity': granularity,
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        'series': series,
+        'department_throughput': departments
+    }
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'backfill':
+        print(__doc__)
+        sys.exit(1)
+    print("Global Web Work - Rebuilding analytics rollups")
+    print("=" * 50)
+    result = backfill()
+    print(f"✓ Scanned {result['tasks_scanned']} tasks, wrote {result['buckets_written']} buckets")
@@ -0,0 +1,204 @@
+"""
+In-process full-text search over task titles and descriptions.
+
+TaskSearchIndex is an inverted index (token -> {slot: weighted term
+frequency}) ranked with BM25, scored with NumPy over integer task slots. Title tokens count more than description
+tokens. Only ids and the two columns used for role scoping are kept per task;
+the matching rows are fetched from Supabase after ranking. The index is built
+on first use (or at warmup), updated by the task routes, and caught up with
+other workers' writes by reading tasks whose `updated_at` moved past the
+newest one it has seen.
+"""
+
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from index_sync import ChangeFeed
+from supabase_client import iter_tasks, get_tasks_updated_since, get_newest_task_update
+
+TITLE_WEIGHT = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+SYNC_SECONDS = float(os.environ.get('SEARCH_SYNC_SECONDS', '5'))
+TASK_COLUMNS = 'id,title,description,assigned_to,created_by,updated_at'
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset(
+    'a an and are as at be by for from in is it of on or the to with'.split()
+)
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens without stopwords."""
+    return [t for t in _TOKEN_RE.findall((text or '').lower()) if t not in STOPWORDS]
+
+
+class TaskSearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._feed = ChangeFeed(lambda since: get_tasks_updated_since(since, TASK_COLUMNS),
+                                get_newest_task_update, SYNC_SECONDS)
+        self._reset()
+
+    def _reset(self):
+        self.built_at = None
+        # Tasks are addressed by integer slots so scoring can run on NumPy arrays
+        self._slots = {}                     # task_id -> slot
+        self._ids = []                       # slot -> task_id (None when free)
+        self._free = []
+        self._lengths = np.zeros(1024, dtype=np.float64)
+        self._total_length = 0.0
+        self._postings = defaultdict(dict)   # token -> {slot: weighted tf}
+        self._doc_terms = {}                 # slot -> Counter of weighted tf
+        self._owners = {}                    # slot -> (assigned_to, created_by)
+        self._by_user = defaultdict(set)     # unique_id -> slots they can see
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def rebuild(self):
+        """Index every task from Supabase."""
+        with self._lock:
+            self._reset()
+            count = 0
+            watermark = self._feed.mark()
+            for page in iter_tasks(TASK_COLUMNS):
+                for task in page:
+                    self._add(task)
+                count += len(page)
+            self.built_at = time.monotonic()
+            self._feed.loaded(watermark)
+        return {'ok': True, 'tasks': count}
+
+    def ensure_built(self):
+        if self.built_at is None:
+            with self._lock:
+                # Requests that queued behind the first build must not rebuild again
+                if self.built_at is None:
+                    self.rebuild()
+
+    def _allocate(self, task_id):
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot] = task_id
+        else:
+            slot = len(self._ids)
+            self._ids.append(task_id)
+            if slot >= len(self._lengths):
+                self._lengths = np.concatenate([self._lengths, np.zeros(len(self._lengths))])
+        self._slots[task_id] = slot
+        return slot
+
+    def _add(self, task):
+        terms = Counter()
+        for token in tokenize(task.get('title')):
+            terms[token] += TITLE_WEIGHT
+        for token in tokenize(task.get('description')):
+            terms[token] += 1
+        slot = self._allocate(task['id'])
+        for token, tf in terms.items():
+            self._postings[token][slot] = tf
+        self._doc_terms[slot] = terms
+        length = sum(terms.values())
+        self._lengths[slot] = length
+        self._total_length += length
+        owners = (task.get('assigned_to'), task.get('created_by'))
+        self._owners[slot] = owners
+        for unique_id in set(owners) - {None}:
+            self._by_user[unique_id].add(slot)
+
+    def _remove(self, task_id):
+        slot = self._slots.pop(task_id, None)
+        if slot is None:
+            return
+        for token in self._doc_terms.pop(slot):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(slot, None)
+                if not postings:
+                    del self._postings[token]
+        self._total_length -= self._lengths[slot]
+        self._lengths[slot] = 0.0
+        for unique_id in set(self._owners.pop(slot)) - {None}:
+            self._by_user[unique_id].discard(slot)
+        self._ids[slot] = None
+        self._free.append(slot)
+
+    def upsert(self, task):
+        """Add or re-index one task (called after insert_task / update_task)."""
+        with self._lock:
+            if self.built_at is None:
+                return
+            self._remove(task['id'])
+            self._add(task)
+
+    def sync(self):
+        """Pull tasks written by other workers since the newest one already seen."""
+        changed = self._feed.poll()
+        if changed is None:
+            return 0
+        with self._lock:
+            for task in changed:
+                self.upsert(task)
+            self._feed.advance(changed)
+        return len(changed)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def search(self, query, user_id=None, limit=20):
+        """Return (total_matches, [(task_id, score)]) for the top ``limit`` matches.
+
+        With ``user_id`` only tasks assigned to or created by that user are considered.
+        """
+        tokens = set(tokenize(query))
+        with self._lock:
+            total_docs = len(self._slots)
+            if not tokens or not total_docs:
+                return 0, []
+            avg_length = self._total_length / total_docs
+            postings_lists = [self._postings[t] for t in tokens if t in self._postings]
+            allowed = self._by_user.get(user_id, set()) if user_id is not None else None
+
+            # Users with few tasks: score just their slots; otherwise score whole postings lists
+            if allowed is not None and len(allowed) < sum(len(p) for p in postings_lists):
+                candidates = np.fromiter(allowed, dtype=np.int64, count=len(allowed))
+                scores = np.zeros(len(candidates))
+                for postings in postings_lists:
+                    tf = np.fromiter((postings.get(slot, 0) for slot in allowed), dtype=np.float64, count=len(allowed))
+                    scores += self._bm25(tf, self._lengths[candidates], len(postings), total_docs, avg_length)
+            else:
+                candidates = None
+                scores = np.zeros(len(self._ids))
+                for postings in postings_lists:
+                    slots = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+                    tf = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+                    scores[slots] += self._bm25(tf, self._lengths[slots], len(postings), total_docs, avg_length)
+                if allowed is not None:
+                    mask = np.zeros(len(scores), dtype=bool)
+                    mask[list(allowed)] = True
+                    scores[~mask] = 0.0
+
+            matched = np.flatnonzero(scores > 0)
+            if len(matched) > limit:
+                matched = matched[np.argpartition(-scores[matched], limit)[:limit]]
+            matched = matched[np.argsort(-scores[matched], kind='stable')]
+            top = [
+                (self._ids[candidates[i] if candidates is not None else i], float(scores[i]))
+                for i in matched
+            ]
+            return int(np.count_nonzero(scores > 0)), top
+
+    @staticmethod
+    def _bm25(tf, lengths, doc_freq, total_docs, avg_length):
+        idf = math.log(1 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length)
+        return idf * tf * (BM25_K1 + 1) / (tf + norm)
@@ -0,0 +1,82 @@
+"""
+Single-flight call coalescing with a short micro-cache.
+
+When many requests ask for the same thing at once (a stand-up where everyone
+opens the dashboard), SingleFlight.do() runs the work once per key. The first
+caller runs it, callers arriving while it is in flight wait for that result,
+and callers within ``window`` seconds after it finished reuse it. Errors are
+shared with the callers already waiting but never cached.
+
+Results are shared objects: callers must copy before mutating them.
+"""
+
+import threading
+import time
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'finished_at')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+
+class SingleFlight:
+    def __init__(self, window):
+        self.window = window
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._swept_at = time.monotonic()
+
+    def do(self, key, fn, timeout=None):
+        """Return fn()'s result, shared with concurrent and recent callers of the same key.
+
+        Raises TimeoutError if a shared call is still running after ``timeout`` seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.finished_at is not None and now - call.finished_at > self.window:
+                call = None
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._sweep(now)
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError('Timed out waiting for a shared call')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                call.finished_at = time.monotonic()
+                if (call.error is not None or self.window <= 0) and self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def clear(self):
+        """Forget every result; calls still in flight finish but are not reused afterwards."""
+        with self._lock:
+            self._calls.clear()
+
+    def _sweep(self, now):
+        # Drop expired results about once per window so distinct keys do not pile up
+        if now - self._swept_at < max(self.window, 1.0):
+            return
+        self._swept_at = now
+        expired = [key for key, call in self._calls.items()
+                   if call.finished_at is not None and now - call.finished_at > self.window]
+        for key in expired:
+            del self._calls[key]
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+AI suggestion scoring and batch precomputation.
+
+`/api/ai/suggestions` serves rows from the `ai_suggestions` table. This script
+fills that table for every user in one pass: it loads tasks once into the
+columnar TaskStore, counts open and soon-due tasks per assignee with two
+bincounts and writes the rows in batches. Run it from cron before the
+morning peak (or trigger it from the admin endpoint).
+
+Usage:
+    python suggestions.py precompute
+"""
+
+import os
+import sys
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+from supabase_client import list_users, upsert_precomputed_suggestions, MAX_ROWS
+from rollups import parse_timestamp
+from task_store import TaskStore
+
+WORKLOAD_THRESHOLD = 5
+DEADLINE_WINDOW_DAYS = 3
+UPSERT_BATCH_SIZE = 500
+# Precomputed rows older than this are ignored and recomputed on demand
+MAX_AGE_SECONDS = float(os.environ.get('SUGGESTIONS_MAX_AGE_SECONDS', '86400'))
+
+
+def build_suggestions(open_count, due_soon):
+    """Build the suggestion list from a user's open task count and tasks due within the window."""
+    suggestions = []
+
+    # Workload distribution suggestion
+    if open_count > WORKLOAD_THRESHOLD:
+        suggestions.append({
+            'type': 'workload',
+            'message': 'You have many pending tasks. Consider delegating some to team members.',
+            'priority': 'high'
+        })
+
+    # Deadline warning
+    if due_soon:
+        suggestions.append({
+            'type': 'deadline',
+            'message': f'You have {due_soon} tasks due within {DEADLINE_WINDOW_DAYS} days.',
+            'priority': 'medium'
+        })
+
+    return suggestions
+
+
+def score_user_tasks(open_tasks, now=None):
+    """Build the suggestion list for one user from their open task dicts."""
+    now = now or datetime.now()
+    due_soon = sum(
+        1 for t in open_tasks
+        if parse_timestamp(t.get('due_date')) is not None
+        and (parse_timestamp(t.get('due_date')) - now).days <= DEADLINE_WINDOW_DAYS
+    )
+    return build_suggestions(len(open_tasks), due_soon)
+
+
+def is_fresh(row):
+    """True if a stored suggestions row is recent enough to serve."""
+    computed_at = parse_timestamp(row.get('computed_at')) if row else None
+    return computed_at is not None and (datetime.now() - computed_at).total_seconds() <= MAX_AGE_SECONDS
+
+
+def precompute_all(store=None, batch_size=UPSERT_BATCH_SIZE):
+    """Compute and store suggestions for every user in one pass.
+
+    Pass the app's already built ``store`` to skip loading tasks again.
+    """
+    if store is None:
+        store = TaskStore()
+        store.rebuild()
+    else:
+        store.sync()
+    now = datetime.now()
+    summaries = store.open_task_summaries(DEADLINE_WINDOW_DAYS, now)
+
+    # Users with no open tasks still get a (empty) row so they are served from the table
+    cursor = None
+    while True:
+        users = list_users(['unique_id'], MAX_ROWS, after=cursor)
+        if not users:
+            break
+        for user in users:
+            summaries.setdefault(user['unique_id'], (0, 0))
+        cursor = users[-1]['unique_id']
+
+    computed_at = now.isoformat()
+    rows = [
+        {
+            'user_id': user_id,
+            'suggestions': build_suggestions(open_count, due_soon),
+            'open_tasks': open_count,
+            'computed_at': computed_at
+        }
+        for user_id, (open_count, due_soon) in summaries.items()
+    ]
+    for start in range(0, len(rows), batch_size):
+        upsert_precomputed_suggestions(rows[start:start + batch_size])
+
+    return {'users': len(rows), 'batches': -(-len(rows) // batch_size)}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'precompute':
+        print(__doc__)
+        sys.exit(1)
+    print("Global Web Work - Precomputing AI suggestions")
+    print("=" * 50)
+    result = precompute_all()
+    print(f"✓ Stored suggestions for {result['users']} users ({result['batches']} batches)")
@@ -1,7 +1,16 @@
+import functools
 import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from typing import Optional
 from dotenv import load_dotenv
 
+from profiling import timed
+from singleflight import SingleFlight
+
 # Load environment variables FIRST
 load_dotenv()
 
@@ -13,10 +22,50 @@ except Exception:
     create_client = None
     Client = None
 
+try:
+    from supabase.lib.client_options import ClientOptions
+except Exception:
+    ClientOptions = None
+
+try:
+    from postgrest.exceptions import APIError
+except Exception:
+    # Without postgrest there are no API errors to tell apart from transport failures
+    class APIError(Exception):
+        pass
+
 SUPABASE_URL = os.environ.get('SUPABASE_URL')
 SUPABASE_KEY = os.environ.get('SUPABASE_KEY')
 
+# How long (seconds) a deep health check result is reused before hitting Supabase again.
+HEALTH_CACHE_TTL = float(os.environ.get('HEALTH_CACHE_TTL', '10'))
+
+# Resilience settings: per-call deadline, retries for idempotent reads, circuit breaker
+CALL_TIMEOUT = float(os.environ.get('SUPABASE_CALL_TIMEOUT', '5'))
+READ_RETRIES = int(os.environ.get('SUPABASE_READ_RETRIES', '2'))
+RETRY_BACKOFF = float(os.environ.get('SUPABASE_RETRY_BACKOFF', '0.1'))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('SUPABASE_BREAKER_FAILURES', '5'))
+BREAKER_RESET_SECONDS = float(os.environ.get('SUPABASE_BREAKER_RESET', '30'))
+
+# PostgREST's max-rows setting: no response carries more rows than this
+MAX_ROWS = int(os.environ.get('SUPABASE_MAX_ROWS', '1000'))
+
+# Optional read replica: read helpers use it unless the session wrote recently
+SUPABASE_READ_URL = os.environ.get('SUPABASE_READ_URL')
+SUPABASE_READ_KEY = os.environ.get('SUPABASE_READ_KEY') or SUPABASE_KEY
+READ_YOUR_WRITES_SECONDS = float(os.environ.get('READ_YOUR_WRITES_SECONDS', '5'))
+
+# Catch-up syncs of the in-process indexes re-read this far behind the newest
+# timestamp they have seen, for transactions that committed after a later one
+SYNC_OVERLAP_SECONDS = float(os.environ.get('SYNC_OVERLAP_SECONDS', '5'))
+
+# Identical concurrent reads share one call; its result is reused for this long (0: in-flight only)
+COALESCE_WINDOW_SECONDS = float(os.environ.get('COALESCE_WINDOW_SECONDS', '1'))
+
 _supabase_client = None
+_read_client = None
+_health_cache = {'result': None, 'checked_at': 0.0}
+_health_lock = threading.Lock()
 
 
 def get_supabase_client():
@@ -37,23 +86,325 @@ def get_supabase_client():
             "supabase package is not installed. Run `pip install supabase` and try again."
         )
 
-    _supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    _supabase_client = _create_client(SUPABASE_URL, SUPABASE_KEY)
     return _supabase_client
 
 
+def _create_client(url, key):
+    if ClientOptions is None:
+        return create_client(url, key)
+    # The HTTP timeout ends a hung request; the per-call deadline in _execute only stops waiting for it
+    return create_client(url, key, options=ClientOptions(postgrest_client_timeout=CALL_TIMEOUT))
+
+
+def get_read_client():
+    """Return the read replica client, or the primary if no replica is configured."""
+    global _read_client
+    if not SUPABASE_READ_URL:
+        return get_supabase_client()
+    if _read_client is not None:
+        return _read_client
+    if create_client is None:
+        raise RuntimeError(
+            "supabase package is not installed. Run `pip install supabase` and try again."
+        )
+    _read_client = _create_client(SUPABASE_READ_URL, SUPABASE_READ_KEY)
+    return _read_client
+
+
+class SupabaseUnavailable(Exception):
+    """Supabase did not answer in time or the circuit breaker is open."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Fail fast after repeated transport failures, then let one trial call through.
+
+    closed: calls pass; ``failure_threshold`` consecutive failures open it.
+    open: calls raise SupabaseUnavailable until ``reset_seconds`` have passed.
+    half-open: a single trial call passes; success closes, failure re-opens.
+    """
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._trial = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return 'half-open'
+            return 'open'
+
+    def before_call(self):
+        """Raise while open; returns a token if this call is the half-open trial, else None."""
+        with self._lock:
+            if self._opened_at is None:
+                return None
+            remaining = self.reset_seconds - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._trial_in_flight:
+                raise SupabaseUnavailable('Supabase circuit breaker is open', retry_after=max(1, int(remaining) + 1))
+            self._trial_in_flight = True
+            self._trial += 1
+            return self._trial
+
+    def release_trial(self, trial):
+        """Free the trial slot of a call that ended without a success or failure being recorded."""
+        with self._lock:
+            if trial is not None and self._trial_in_flight and self._trial == trial:
+                self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+_call_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('SUPABASE_CALL_THREADS', '32')),
+                                    thread_name_prefix='supabase-call')
+_request_budget = threading.local()
+_session = threading.local()
+_reads = SingleFlight(COALESCE_WINDOW_SECONDS)
+_read_state = threading.local()
+
+
+def start_request_budget(seconds):
+    """Give every Supabase call made by this thread a shared deadline."""
+    _request_budget.deadline = time.monotonic() + seconds
+
+
+def clear_request_budget():
+    _request_budget.deadline = None
+
+
+def start_session_consistency(token=None):
+    """Restore this thread's last-write time from a client consistency token.
+
+    The token is the write time in epoch milliseconds, as returned by
+    consistency_token(). Malformed tokens and tokens from the future are ignored.
+    """
+    _session.last_write = None
+    try:
+        last_write = int(token) / 1000.0 if token else None
+    except ValueError:
+        return
+    if last_write is not None and last_write <= time.time() + 1:
+        _session.last_write = last_write
+
+
+def clear_session_consistency():
+    _session.last_write = None
+
+
+def consistency_token():
+    """Token for the client to send back while its reads must see its writes (or None)."""
+    last_write = getattr(_session, 'last_write', None)
+    if last_write is None or time.time() - last_write > READ_YOUR_WRITES_SECONDS:
+        return None
+    return str(int(last_write * 1000))
+
+
+def _pinned_to_primary():
+    return consistency_token() is not None
+
+
+def _call_timeout():
+    deadline = getattr(_request_budget, 'deadline', None)
+    if deadline is None:
+        return CALL_TIMEOUT
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise SupabaseUnavailable('Request time budget exhausted before calling Supabase')
+    return min(CALL_TIMEOUT, remaining)
+
+
+def _execute(query, idempotent=False):
+    """Run a query builder under the call deadline, retry policy and circuit breaker.
+
+    Only idempotent reads are retried (with jittered exponential backoff).
+    Errors returned by the API itself (bad filter, constraint violation) are
+    raised unchanged and do not count against the breaker; timeouts and
+    connection failures do, and surface as SupabaseUnavailable.
+    """
+    attempts = 1 + (READ_RETRIES if idempotent else 0)
+    last_error = None
+    for attempt in range(attempts):
+        # Checked before taking the breaker's trial slot, which an exhausted budget would otherwise strand
+        timeout = _call_timeout()
+        trial = breaker.before_call()
+        try:
+            future = _call_executor.submit(query.execute)
+            try:
+                resp = future.result(timeout=timeout)
+            except FutureTimeout:
+                future.cancel()
+                last_error = f'Supabase call timed out after {timeout:.2f}s'
+            except APIError:
+                breaker.record_success()
+                raise
+            except Exception as e:
+                last_error = str(e)
+            else:
+                breaker.record_success()
+                return resp
+            breaker.record_failure()
+        finally:
+            # No-op once an outcome was recorded; otherwise the slot must not stay taken
+            breaker.release_trial(trial)
+
+        if attempt + 1 < attempts:
+            delay = RETRY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5)
+            deadline = getattr(_request_budget, 'deadline', None)
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+    raise SupabaseUnavailable(last_error)
+
+
+def _write(query):
+    """Run a user-visible write on the primary and pin this session to it for a while."""
+    resp = _execute(query)
+    _session.last_write = time.time()
+    # Later reads in this process must not be served from before the write
+    _reads.clear()
+    return resp
+
+
+def _helper(fn):
+    """Count a helper's wall time as `supabase.<name>` in profiled requests."""
+    return timed(f'supabase.{fn.__name__}')(fn)
+
+
+def _copy_rows(data):
+    if isinstance(data, list):
+        return [dict(row) if isinstance(row, dict) else row for row in data]
+    return dict(data) if isinstance(data, dict) else data
+
+
+class _FailedRead(Exception):
+    """Carries a read helper's error fallback through SingleFlight, which never keeps errors."""
+
+    def __init__(self, fallback):
+        super().__init__('read failed')
+        self.fallback = fallback
+
+
+def _failed_read(fallback):
+    """Return a read helper's fallback after a swallowed error, so _coalesced does not reuse it."""
+    _read_state.failed = True
+    return fallback
+
+
+def _coalesced(fn):
+    """Let concurrent calls of a read helper with the same arguments share one Supabase call.
+
+    Sessions pinned to the primary (read-your-writes) always make their own call.
+    Each caller gets its own copy of the rows. A fallback returned through
+    _failed_read() reaches the callers already waiting but is not reused by
+    later ones, which make a fresh call.
+    """
+    def call(*args, **kwargs):
+        _read_state.failed = False
+        result = fn(*args, **kwargs)
+        if _read_state.failed:
+            raise _FailedRead(result)
+        return result
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _pinned_to_primary():
+            return fn(*args, **kwargs)
+        key = repr((fn.__name__, args, sorted(kwargs.items())))
+        deadline = getattr(_request_budget, 'deadline', None)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            return _copy_rows(_reads.do(key, lambda: call(*args, **kwargs), timeout=timeout))
+        except _FailedRead as e:
+            return _copy_rows(e.fallback)
+        except TimeoutError:
+            raise SupabaseUnavailable('Request time budget exhausted waiting for a shared Supabase call')
+    return wrapper
+
+
 # Helper convenience functions (small and safe):
-def health_check():
-    """Simple connectivity check against Supabase (returns dict) or None if not configured."""
-    client = get_supabase_client()
+def _probe_supabase():
+    """Run the cheapest possible round trip: one primary key, no row data returned."""
+    try:
+        client = get_supabase_client()
+    except RuntimeError as e:
+        return {'ok': False, 'configured': True, 'error': str(e), 'message': 'Supabase client unavailable'}
     if client is None:
         return {'configured': False, 'message': 'Supabase credentials not set'}
 
+    result = _probe_client(client)
+    result['breaker'] = breaker.state
+    if SUPABASE_READ_URL:
+        result['read_replica'] = _probe_client(get_read_client())
+    return result
+
+
+def _probe_client(client):
+    started = time.monotonic()
     try:
-        # Try to query the users table (or any public table) to verify connectivity
-        resp = client.table('users').select('*').limit(1).execute()
-        return {'ok': True, 'configured': True, 'message': 'Connected to Supabase', 'data': resp.data}
+        _execute(client.table('users').select('id').limit(1))
+        return {
+            'ok': True,
+            'configured': True,
+            'message': 'Connected to Supabase',
+            'latency_ms': round((time.monotonic() - started) * 1000, 2)
+        }
     except Exception as e:
-        return {'ok': False, 'configured': True, 'error': str(e), 'message': 'Failed to connect to Supabase'}
+        return {
+            'ok': False,
+            'configured': True,
+            'error': str(e),
+            'message': 'Failed to connect to Supabase'
+        }
+
+
+@_helper
+def health_check(max_age=None):
+    """Connectivity check against Supabase (returns dict).
+
+    The result is cached for ``HEALTH_CACHE_TTL`` seconds (or ``max_age`` if given)
+    so frequent load-balancer probes do not turn into database load. Only one
+    caller refreshes an expired result; concurrent callers wait and reuse it.
+    """
+    ttl = HEALTH_CACHE_TTL if max_age is None else max_age
+    with _health_lock:
+        age = time.monotonic() - _health_cache['checked_at']
+        if _health_cache['result'] is None or age >= ttl:
+            _health_cache['result'] = _probe_supabase()
+            _health_cache['checked_at'] = time.monotonic()
+            age = 0.0
+        result = dict(_health_cache['result'])
+    result['cached'] = age > 0
+    result['age_seconds'] = round(age, 3)
+    return result
+
+
+def warmup():
+    """Create the Supabase client and open its connection ahead of the first request."""
+    return health_check(max_age=0)
 
 
 def table(table_name):
@@ -64,71 +415,490 @@ def table(table_name):
     return client.table(table_name)
 
 
+def read_table(table_name):
+    """Get a table reference for reads: the replica, unless this session must read its own writes."""
+    if _pinned_to_primary():
+        return table(table_name)
+    client = get_read_client()
+    if client is None:
+        raise RuntimeError('Supabase not configured. Set SUPABASE_URL and SUPABASE_KEY environment variables.')
+    return client.table(table_name)
+
+
+@_helper
 def insert_user(user_data):
     """Insert a user into the users table."""
     try:
-        resp = table('users').insert(user_data).execute()
+        resp = _write(table('users').insert(user_data))
         return resp.data[0] if resp.data else None
+    except SupabaseUnavailable:
+        raise
     except Exception as e:
         print(f'Error inserting user: {e}')
         return None
 
 
+@_helper
+def insert_users(users):
+    """Insert several users in one multi-row request."""
+    try:
+        resp = _write(table('users').insert(users))
+        return resp.data
+    except SupabaseUnavailable:
+        raise
+    except Exception as e:
+        print(f'Error inserting users: {e}')
+        return []
+
+
+@_helper
+@_coalesced
 def get_user_by_id(unique_id):
     """Get a user by their unique ID."""
     try:
-        resp = table('users').select('*').eq('unique_id', unique_id).execute()
+        resp = _execute(read_table('users').select('*').eq('unique_id', unique_id), idempotent=True)
         return resp.data[0] if resp.data else None
+    except SupabaseUnavailable:
+        raise
+    except Exception as e:
+        print(f'Error fetching user: {e}')
+        return _failed_read(None)
+
+
+@_helper
+def get_user_by_email(email):
+    """Get a user by email address (from the primary; used for uniqueness checks)."""
+    try:
+        resp = _execute(table('users').select('*').eq('email', email), idempotent=True)
+        return resp.data[0] if resp.data else None
+    except SupabaseUnavailable:
+        raise
     except Exception as e:
         print(f'Error fetching user: {e}')
         return None
 
 
+@_helper
+def find_existing_users(unique_ids, emails, batch_size=500):
+    """Return (unique_ids, emails) that already exist, checked in batched IN queries.
+
+    Errors are raised rather than swallowed so an import never proceeds unchecked.
+    """
+    existing_ids, existing_emails = set(), set()
+    unique_ids, emails = list(unique_ids), list(emails)
+    for column, values, found in (('unique_id', unique_ids, existing_ids), ('email', emails, existing_emails)):
+        for start in range(0, len(values), batch_size):
+            query = table('users').select(column).in_(column, values[start:start + batch_size])
+            resp = _execute(query, idempotent=True)
+            found.update(row[column] for row in resp.data)
+    return existing_ids, existing_emails
+
+
+@_helper
+@_coalesced
 def get_all_users():
     """Get all users."""
     try:
-        resp = table('users').select('*').execute()
+        resp = _execute(read_table('users').select('*'), idempotent=True)
         return resp.data
+    except SupabaseUnavailable:
+        raise
     except Exception as e:
         print(f'Error fetching users: {e}')
-        return []
+        return _failed_read([])
 
 
+@_helper
+@_coalesced
+def list_users(columns, limit, after=None, search=None, ids=None):
+    """Get one page of users ordered by unique_id.
+
+    ``columns`` is a list of column names to project, ``after`` is the last
+    unique_id of the previous page (keyset pagination), ``search`` is a
+    case-insensitive prefix matched against name, email or department and
+    ``ids`` restricts the page to those user ids.
+    """
+    try:
+        query = read_table('users').select(','.join(columns))
+        if ids:
+            query = query.in_('id', list(ids))
+        if after:
+            query = query.gt('unique_id', after)
+        if search:
+            query = query.or_(','.join(f'{column}.ilike.{search}*' for column in ('name', 'email', 'department')))
+        resp = _execute(query.order('unique_id').limit(limit), idempotent=True)
+        return resp.data
+    except SupabaseUnavailable:
+        raise
+    except Exception as e:
+        print(f'Error listing users: {e}')
+        return _failed_read([])
+
+
+@_helper
 def insert_task(task_data):
     """Insert a task into the tasks table."""
     try:
-        resp = table('tasks').insert(task_data).execute()
+        resp = _write(table('tasks').insert(task_data))
         return resp.data[0] if resp.data else None
+    except SupabaseUnavailable:
+        raise
     except Exception as e:
         print(f'Error inserting task: {e}')
         return None
 
 
+@_helper
+@_coalesced
 def get_tasks():
     """Get all tasks."""
     try:
-        resp = table('tasks').select('*').execute()
+        resp = _execute(read_table('tasks').select('*'), idempotent=True)
         return resp.data
+    except SupabaseUnavailable:
+        raise
     except Exception as e:
         print(f'Error fetching tasks: {e}')
-        return []
+        return _failed_read([])
+
+
+@_helper
+def iter_tasks(columns='*', page_size=1000, exclude_status=None, filters=None):
+    """Yield pages of tasks ordered by id (keyset pagination, constant memory).
+
+    Pass ``exclude_status`` (e.g. ``'completed'``) to stream only the other tasks.
+    ``filters`` is a list of ``(operator, column, value)`` tuples applied to the
+    query, e.g. ``[('eq', 'department', 'IT'), ('gte', 'created_at', '2024-01-01')]``.
+    Pages hold at most SUPABASE_MAX_ROWS rows. Paging stops at the first empty
+    page, not a short one, because the server may return fewer rows than asked.
+    """
+    page_size = min(page_size, MAX_ROWS)
+    last_id = None
+    while True:
+        query = read_table('tasks').select(columns)
+        if exclude_status:
+            query = query.neq('status', exclude_status)
+        for operator, column, value in filters or []:
+            query = getattr(query, operator)(column, value)
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        resp = _execute(query.order('id').limit(page_size), idempotent=True)
+        if not resp.data:
+            return
+        yield resp.data
+        last_id = resp.data[-1]['id']
+
+
+@_helper
+@_coalesced
+def get_open_tasks_for_user(user_id, columns='*'):
+    """Get the tasks assigned to a user that are not completed."""
+    try:
+        query = read_table('tasks').select(columns).eq('assigned_to', user_id).neq('status', 'completed')
+        resp = _execute(query, idempotent=True)
+        return resp.data
+    except SupabaseUnavailable:
+        raise
+    except Exception as e:
+        print(f'Error fetching open tasks: {e}')
+        return _failed_read([])
+
+
+@_helper
+@_coalesced
+def get_tasks_for_user(user_id, columns='*'):
+    """Get the tasks assigned to or created by a user, newest first."""
+    try:
+        query = read_table('tasks').select(columns).or_(f'assigned_to.eq.{user_id},created_by.eq.{user_id}')
+        resp = _execute(query.order('created_at', desc=True), idempotent=True)
+        return resp.data
+    except SupabaseUnavailable:
+        raise
+    except Exception as e:
+        print(f'Error fetching tasks: {e}')
+        return _failed_read([])
+
+
+@_helper
+@_coalesced
+def get_tasks_by_ids(task_ids, columns='*'):
+    """Get several tasks in one round trip (order is not preserved)."""
+    try:
+        resp = _execute(read_table('tasks').select(columns).in_('id', list(task_ids)), idempotent=True)
+        return resp.data
+    except SupabaseUnavailable:
+        raise
+    except Exception as e:
+        print(f'Error fetching tasks: {e}')
+        return _failed_read([])
+
+
+def _changed_since(table_name, column, since, columns, page_size):
+    """Every row whose ``column`` is at or after ``since``, paged by (column, id) from the primary.
+
+    A single unordered request would be cut off at max-rows with an arbitrary
+    subset, so rows are read in keyset order until a page comes back empty.
+    """
+    selected = columns if columns == '*' else ','.join(dict.fromkeys(columns.split(',') + ['id', column]))
+    page_size = min(page_size, MAX_ROWS)
+    rows, last = [], None
+    while True:
+        query = table(table_name).select(selected).not_.is_(column, 'null')
+        if since is not None:
+            query = query.gte(column, since)
+        if last is not None:
+            # Values are quoted: timestamps contain characters reserved in PostgREST logic trees
+            value, last_id = last[column], last['id']
+            query = query.or_(f'{column}.gt."{value}",and({column}.eq."{value}",id.gt."{last_id}")')
+        resp = _execute(query.order(f'{column},id').limit(page_size), idempotent=True)
+        if not resp.data:
+            return rows
+        rows += resp.data
+        last = resp.data[-1]
+
+
+@_helper
+def get_tasks_updated_since(since, columns='*', page_size=1000):
+    """Get tasks created or updated at or after an ISO timestamp (every task if ``since`` is None).
+
+    Reads the primary: on a lagging replica a write could land behind the sync window.
+    Errors are raised rather than swallowed so a failed sync is never taken for "no changes".
+    """
+    return _changed_since('tasks', 'updated_at', since, columns, page_size)
+
+
+@_helper
+def get_newest_task_update():
+    """Newest tasks.updated_at (naive UTC) on the replica, or None if there is none.
+
+    Read just before a full load from the same source: anything the load
+    cannot have seen was written after it, so it is the load's sync watermark.
+    Errors are raised, as in get_tasks_updated_since.
+    """
+    query = read_table('tasks').select('updated_at').not_.is_('updated_at', 'null')
+    resp = _execute(query.order('updated_at', desc=True).limit(1), idempotent=True)
+    return newest_timestamp(resp.data)
 
 
-def get_task_by_id(task_id):
-    """Get a task by ID."""
+def newest_timestamp(rows, column='updated_at', newest=None):
+    """Latest ``column`` value among rows as a naive UTC datetime, or ``newest`` if none is later.
+
+    Sync watermarks come from these database timestamps, never the app's clock.
+    """
+    for row in rows:
+        value = row.get(column)
+        if not value:
+            continue
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            continue
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        if newest is None or parsed > newest:
+            newest = parsed
+    return newest
+
+
+def sync_since(watermark):
+    """ISO lower bound for the catch-up read after ``watermark`` (None: read everything)."""
+    if watermark is None:
+        return None
+    return (watermark - timedelta(seconds=SYNC_OVERLAP_SECONDS)).isoformat()
+
+
+@_helper
+def get_task_by_id(task_id, primary=False):
+    """Get a task by ID (from the primary with ``primary=True``, e.g. before updating it)."""
     try:
-        resp = table('tasks').select('*').eq('id', task_id).execute()
+        resp = _execute((table if primary else read_table)('tasks').select('*').eq('id', task_id), idempotent=True)
         return resp.data[0] if resp.data else None
+    except SupabaseUnavailable:
+        raise
     except Exception as e:
         print(f'Error fetching task: {e}')
         return None
 
 
+@_helper
 def update_task(task_id, updates):
     """Update a task."""
     try:
-        resp = table('tasks').update(updates).eq('id', task_id).execute()
+        resp = _write(table('tasks').update(updates).eq('id', task_id))
         return resp.data[0] if resp.data else None
+    except SupabaseUnavailable:
+        raise
     except Exception as e:
         print(f'Error updating task: {e}')
         return None
+
+
+@_helper
+def insert_task_dependencies(rows):
+    """Insert ``{task_id, depends_on, created_by}`` dependency rows in one request."""
+    try:
+        resp = _write(table('task_dependencies').insert(rows))
+        return resp.data
+    except SupabaseUnavailable:
+        raise
+    except Exception as e:
+        print(f'Error inserting task dependencies: {e}')
+        return []
+
+
+@_helper
+def delete_task_dependency(task_id, depends_on):
+    """Remove one dependency; returns whether a row was deleted."""
+    try:
+        resp = _write(table('task_dependencies').delete().eq('task_id', task_id).eq('depends_on', depends_on))
+        return bool(resp.data)
+    except SupabaseUnavailable:
+        raise
+    except Exception as e:
+        print(f'Error deleting task dependency: {e}')
+        return False
+
+
+@_helper
+def iter_task_dependencies(page_size=1000):
+    """Yield pages of dependency rows ordered by id (keyset pagination).
+
+    Pages are capped at max-rows and read until one comes back empty, as in iter_tasks.
+    """
+    page_size = min(page_size, MAX_ROWS)
+    last_id = None
+    while True:
+        query = read_table('task_dependencies').select('id,task_id,depends_on')
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        resp = _execute(query.order('id').limit(page_size), idempotent=True)
+        if not resp.data:
+            return
+        yield resp.data
+        last_id = resp.data[-1]['id']
+
+
+@_helper
+def get_task_dependencies_since(since, page_size=1000):
+    """Get dependency rows created at or after an ISO timestamp (every row if ``since`` is None).
+
+    Paged by (created_at, id) from the primary and raises on errors, like get_tasks_updated_since.
+    """
+    return _changed_since('task_dependencies', 'created_at', since, 'id,task_id,depends_on,created_at', page_size)
+
+
+@_helper
+def get_newest_task_dependency():
+    """Newest task_dependencies.created_at (naive UTC) on the replica, like get_newest_task_update."""
+    query = read_table('task_dependencies').select('created_at').not_.is_('created_at', 'null')
+    resp = _execute(query.order('created_at', desc=True).limit(1), idempotent=True)
+    return newest_timestamp(resp.data, 'created_at')
+
+
+@_helper
+def get_tasks_due_for_rescore(before, columns='*', limit=500):
+    """Get tasks whose next priority threshold crossing is at or before an ISO timestamp.
+
+    Reads the primary so a run never sees its own previous batch again on a lagging replica.
+    """
+    query = table('tasks').select(columns).lte('next_rescore_at', before)
+    resp = _execute(query.order('next_rescore_at').limit(limit), idempotent=True)
+    return resp.data
+
+
+@_helper
+def apply_priority_rescores(rows):
+    """Write one batch of ``{id, ai_priority_score, next_rescore_at}`` rows in one call."""
+    client = get_supabase_client()
+    if client is None:
+        raise RuntimeError('Supabase not configured. Set SUPABASE_URL and SUPABASE_KEY environment variables.')
+    resp = _execute(client.rpc('apply_priority_rescores', {'p_rows': rows}))
+    return resp.data
+
+
+@_helper
+def increment_task_rollup(bucket_date, department, created=0, completed=0, timed=0,
+                          predicted_hours=0.0, actual_hours=0.0):
+    """Atomically add deltas to one (day, department) analytics bucket."""
+    try:
+        client = get_supabase_client()
+        if client is None:
+            raise RuntimeError('Supabase not configured. Set SUPABASE_URL and SUPABASE_KEY environment variables.')
+        _execute(client.rpc('increment_task_rollup', {
+            'p_bucket_date': bucket_date,
+            'p_department': department,
+            'p_created': created,
+            'p_completed': completed,
+            'p_timed': timed,
+            'p_predicted_hours': predicted_hours,
+            'p_actual_hours': actual_hours
+        }))
+        return True
+    except Exception as e:
+        print(f'Error updating task rollup: {e}')
+        return False
+
+
+@_helper
+def upsert_task_rollups(rows):
+    """Replace analytics buckets (used by the backfill)."""
+    try:
+        resp = _execute(table('task_daily_rollups').upsert(rows, on_conflict='bucket_date,department'))
+        return resp.data
+    except Exception as e:
+        print(f'Error writing task rollups: {e}')
+        return []
+
+
+@_helper
+@_coalesced
+def get_task_rollups(start_date, end_date, department=None):
+    """Get analytics buckets between two ISO dates (inclusive)."""
+    try:
+        query = read_table('task_daily_rollups').select('*').gte('bucket_date', start_date).lte('bucket_date', end_date)
+        if department:
+            query = query.eq('department', department)
+        resp = _execute(query.order('bucket_date'), idempotent=True)
+        return resp.data
+    except SupabaseUnavailable:
+        raise
+    except Exception as e:
+        print(f'Error fetching task rollups: {e}')
+        return _failed_read([])
+
+
+@_helper
+@_coalesced
+def get_precomputed_suggestions(user_id):
+    """Get the stored suggestions row for a user (or None)."""
+    try:
+        resp = _execute(read_table('ai_suggestions').select('*').eq('user_id', user_id).limit(1), idempotent=True)
+        return resp.data[0] if resp.data else None
+    except SupabaseUnavailable:
+        raise
+    except Exception as e:
+        print(f'Error fetching suggestions: {e}')
+        return _failed_read(None)
+
+
+@_helper
+def upsert_precomputed_suggestions(rows):
+    """Store suggestions rows keyed by user_id."""
+    try:
+        resp = _execute(table('ai_suggestions').upsert(rows, on_conflict='user_id'))
+        return resp.data
+    except Exception as e:
+        print(f'Error storing suggestions: {e}')
+        return []
+
+
+@_helper
+def delete_precomputed_suggestions(user_ids):
+    """Drop stored suggestions so they are recomputed on the next request."""
+    try:
+        _execute(table('ai_suggestions').delete().in_('user_id', list(user_ids)))
+        _reads.clear()
+        return True
+    except Exception as e:
+        print(f'Error invalidating suggestions: {e}')
+        return False
@@ -0,0 +1,81 @@
+"""
+Circuit breaker regression checks (no Supabase needed).
+
+Run from TASK/backend:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import supabase_client
+from supabase_client import CircuitBreaker, SupabaseUnavailable
+
+
+class _Query:
+    """Stands in for a query builder: execute() returns a canned response or raises."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return 'ok'
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self._breaker = supabase_client.breaker
+        supabase_client.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+        supabase_client.clear_request_budget()
+
+    def tearDown(self):
+        supabase_client.breaker = self._breaker
+        supabase_client.clear_request_budget()
+
+    def _open_and_wait(self):
+        with self.assertRaises(SupabaseUnavailable):
+            supabase_client._execute(_Query(ConnectionError('refused')))
+        self.assertEqual(supabase_client.breaker.state, 'open')
+        time.sleep(0.06)
+        self.assertEqual(supabase_client.breaker.state, 'half-open')
+
+    def test_exhausted_budget_does_not_strand_the_trial_slot(self):
+        self._open_and_wait()
+        supabase_client.start_request_budget(-1)
+        query = _Query()
+        with self.assertRaises(SupabaseUnavailable):
+            supabase_client._execute(query)
+        self.assertEqual(query.calls, 0)
+
+        # The next call with time left is let through as the trial and closes the breaker
+        supabase_client.clear_request_budget()
+        self.assertEqual(supabase_client._execute(query), 'ok')
+        self.assertEqual(supabase_client.breaker.state, 'closed')
+
+    def test_release_after_an_unrecorded_exit_frees_the_slot(self):
+        self._open_and_wait()
+        breaker = supabase_client.breaker
+        trial = breaker.before_call()
+        self.assertIsNotNone(trial)
+        with self.assertRaises(SupabaseUnavailable):
+            breaker.before_call()
+        breaker.release_trial(trial)
+        self.assertIsNotNone(breaker.before_call())
+
+    def test_failed_trial_reopens(self):
+        self._open_and_wait()
+        with self.assertRaises(SupabaseUnavailable):
+            supabase_client._execute(_Query(ConnectionError('refused')))
+        self.assertEqual(supabase_client.breaker.state, 'open')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Read coalescing regression checks (no Supabase needed).
+
+Run from TASK/backend:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import supabase_client
+from singleflight import SingleFlight
+
+
+class CoalescedReadTest(unittest.TestCase):
+    def setUp(self):
+        self._reads = supabase_client._reads
+        supabase_client._reads = SingleFlight(60)
+        self.calls = 0
+        self.fail = False
+
+        @supabase_client._coalesced
+        def get_rows(key):
+            self.calls += 1
+            if self.fail:
+                return supabase_client._failed_read([])
+            return [{'key': key}]
+
+        self.get_rows = get_rows
+
+    def tearDown(self):
+        supabase_client._reads = self._reads
+
+    def test_results_are_reused_within_the_window(self):
+        self.assertEqual(self.get_rows('a'), [{'key': 'a'}])
+        self.assertEqual(self.get_rows('a'), [{'key': 'a'}])
+        self.assertEqual(self.calls, 1)
+
+    def test_error_fallbacks_are_not_reused(self):
+        self.fail = True
+        self.assertEqual(self.get_rows('a'), [])
+        self.fail = False
+        self.assertEqual(self.get_rows('a'), [{'key': 'a'}])
+        self.assertEqual(self.calls, 2)
+
+    def test_callers_get_their_own_copy(self):
+        rows = self.get_rows('a')
+        rows[0]['key'] = 'changed'
+        self.assertEqual(self.get_rows('a'), [{'key': 'a'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
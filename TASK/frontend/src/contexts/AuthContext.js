@@ -2,6 +2,15 @@ import React, { createContext, useContext, useState, useEffect } from 'react';
 import axios from 'axios';
 import toast from 'react-hot-toast';
 
+// Send the backend's consistency token back so reads right after a write see it
+axios.interceptors.response.use((response) => {
+  const consistencyToken = response.headers['x-consistency-token'];
+  if (consistencyToken) {
+    axios.defaults.headers.common['X-Consistency-Token'] = consistencyToken;
+  }
+  return response;
+});
+
 const AuthContext = createContext();
 
 export const useAuth = () => {
@@ -35,11 +35,27 @@ const Analytics = () => {
   const [analyticsData, setAnalyticsData] = useState(null);
   const [loading, setLoading] = useState(true);
   const [timeRange, setTimeRange] = useState('7d');
+  const [trendData, setTrendData] = useState([]);
 
   useEffect(() => {
     fetchAnalyticsData();
+    fetchTrendData();
   }, [timeRange]);
 
+  const fetchTrendData = async () => {
+    try {
+      const response = await axios.get('/api/analytics/trends', { params: { range: timeRange } });
+      setTrendData(response.data.series.map(point => ({
+        day: point.date,
+        completed: point.completed,
+        created: point.created
+      })));
+    } catch (error) {
+      // Keep the sample chart when the backend is not available
+      setTrendData([]);
+    }
+  };
+
   const fetchAnalyticsData = async () => {
     try {
       const response = await axios.get('/api/analytics/dashboard');
@@ -317,7 +333,7 @@ const Analytics = () => {
           </div>
           <div className="h-80">
             <ResponsiveContainer width="100%" height="100%">
-              <AreaChart data={productivityData}>
+              <AreaChart data={trendData.length ? trendData : productivityData}>
                 <CartesianGrid strokeDasharray="3 3" />
                 <XAxis dataKey="day" />
                 <YAxis />
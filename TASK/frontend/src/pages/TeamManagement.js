@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { 
   Users, 
   Plus, 
@@ -19,11 +19,28 @@ import { useAuth } from '../contexts/AuthContext';
 import axios from 'axios';
 import toast from 'react-hot-toast';
 
+const PICKER_PAGE_SIZE = 50;
+const MEMBER_LOOKUP_BATCH = 100;
+
+const FALLBACK_USERS = [
+  { id: 'user1', name: 'John Doe', email: 'john@company.com' },
+  { id: 'user2', name: 'Jane Smith', email: 'jane@company.com' },
+  { id: 'user3', name: 'Mike Johnson', email: 'mike@company.com' },
+  { id: 'user4', name: 'Sarah Wilson', email: 'sarah@company.com' },
+  { id: 'user5', name: 'David Brown', email: 'david@company.com' }
+];
+
 const TeamManagement = () => {
   const { user } = useAuth();
   const [teams, setTeams] = useState([]);
   const [teamMembers, setTeamMembers] = useState([]);
-  const [allUsers, setAllUsers] = useState([]);
+  // id -> { id, name, email } for the members shown on team cards
+  const [memberDirectory, setMemberDirectory] = useState({});
+  // One page of the member picker; more pages load as the list is scrolled
+  const [pickerUsers, setPickerUsers] = useState([]);
+  const [pickerCursor, setPickerCursor] = useState(null);
+  const [pickerLoading, setPickerLoading] = useState(false);
+  const pickerRequest = useRef(0);
   const [loading, setLoading] = useState(true);
   const [showCreateTeam, setShowCreateTeam] = useState(false);
   const [showAddMembers, setShowAddMembers] = useState(false);
@@ -50,10 +67,20 @@ const TeamManagement = () => {
   useEffect(() => {
     if (user?.role === 'admin') {
       fetchTeams();
-      fetchAllUsers();
     }
   }, [user]);
 
+  useEffect(() => {
+    fetchMemberDetails(teams.flatMap(team => team.members));
+  }, [teams]);
+
+  useEffect(() => {
+    if (!showAddMembers) return undefined;
+    // Debounced server-side prefix search
+    const timer = setTimeout(() => fetchPickerPage(addMemberQuery, null), 250);
+    return () => clearTimeout(timer);
+  }, [showAddMembers, addMemberQuery]);
+
   const fetchTeams = async () => {
     try {
       const response = await axios.get('/api/teams');
@@ -85,19 +112,52 @@ const TeamManagement = () => {
     }
   };
 
-  const fetchAllUsers = async () => {
+  const fetchMemberDetails = async (memberIds) => {
+    const missing = [...new Set(memberIds)].filter(id => !memberDirectory[id]);
+    if (missing.length === 0) return;
+    const found = {};
     try {
-      const response = await axios.get('/api/users');
-      setAllUsers(response.data);
+      // Looked up by id, in batches that keep the URL short
+      for (let start = 0; start < missing.length; start += MEMBER_LOOKUP_BATCH) {
+        const ids = missing.slice(start, start + MEMBER_LOOKUP_BATCH);
+        const response = await axios.get('/api/users', {
+          params: { fields: 'id,name,email', ids: ids.join(','), limit: ids.length }
+        });
+        response.data.forEach(member => { found[member.id] = member; });
+      }
     } catch (error) {
       // Fallback data when backend is not available
-      setAllUsers([
-        { id: 'user1', name: 'John Doe', email: 'john@company.com', department: 'IT', role: 'employee' },
-        { id: 'user2', name: 'Jane Smith', email: 'jane@company.com', department: 'IT', role: 'employee' },
-        { id: 'user3', name: 'Mike Johnson', email: 'mike@company.com', department: 'IT', role: 'employee' },
-        { id: 'user4', name: 'Sarah Wilson', email: 'sarah@company.com', department: 'Marketing', role: 'employee' },
-        { id: 'user5', name: 'David Brown', email: 'david@company.com', department: 'Marketing', role: 'employee' }
-      ]);
+      FALLBACK_USERS.forEach(member => { found[member.id] = member; });
+    }
+    setMemberDirectory(prev => ({ ...prev, ...found }));
+  };
+
+  const fetchPickerPage = async (query, cursor) => {
+    // Responses for an older query or page are dropped
+    const requestId = ++pickerRequest.current;
+    setPickerLoading(true);
+    try {
+      const response = await axios.get('/api/users', {
+        params: { fields: 'id,name', limit: PICKER_PAGE_SIZE, q: query || undefined, cursor: cursor || undefined }
+      });
+      if (requestId !== pickerRequest.current) return;
+      setPickerUsers(prev => (cursor ? [...prev, ...response.data] : response.data));
+      setPickerCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      if (requestId !== pickerRequest.current) return;
+      // Fallback data when backend is not available
+      const q = (query || '').toLowerCase();
+      setPickerUsers(FALLBACK_USERS.filter(u => u.name.toLowerCase().startsWith(q)));
+      setPickerCursor(null);
+    } finally {
+      if (requestId === pickerRequest.current) setPickerLoading(false);
+    }
+  };
+
+  const handlePickerScroll = (e) => {
+    const { scrollTop, scrollHeight, clientHeight } = e.currentTarget;
+    if (pickerCursor && !pickerLoading && scrollHeight - scrollTop - clientHeight < 48) {
+      fetchPickerPage(addMemberQuery, pickerCursor);
     }
   };
 
@@ -141,6 +201,7 @@ const TeamManagement = () => {
     }
     setShowAddMembers(false);
     setSelectedMembers([]);
+    setAddMemberQuery('');
   };
 
   const handleSendNotification = async (e) => {
@@ -198,9 +259,7 @@ const TeamManagement = () => {
 
   // Get member details for a team
   const getTeamMemberDetails = (team) => {
-    return team.members.map(memberId => 
-      allUsers.find(user => user.id === memberId)
-    ).filter(Boolean);
+    return team.members.map(memberId => memberDirectory[memberId]).filter(Boolean);
   };
 
   // Check if user is admin
@@ -476,23 +535,15 @@ const TeamManagement = () => {
                 <Search className="input-icon-left" />
                 <input
                   type="text"
-                  placeholder="Search employees by name or email..."
+                  placeholder="Search employees by name, email or department..."
                   value={addMemberQuery}
                   onChange={(e) => setAddMemberQuery(e.target.value)}
                   className="form-input"
                 />
               </div>
-              <div className="max-h-64 overflow-y-auto space-y-2 mt-2">
-                {allUsers
+              <div className="max-h-64 overflow-y-auto space-y-2 mt-2" onScroll={handlePickerScroll}>
+                {pickerUsers
                   .filter(user => !selectedTeam.members.includes(user.id))
-                  .filter(user => {
-                    if (!addMemberQuery) return true;
-                    const q = addMemberQuery.toLowerCase();
-                    return (
-                      user.name.toLowerCase().includes(q) ||
-                      user.email.toLowerCase().includes(q)
-                    );
-                  })
                   .map((user) => (
                     <label key={user.id} className="flex items-center p-3 bg-gray-50 dark:bg-slate-700 rounded-lg hover:bg-gray-100 dark:hover:bg-slate-600 cursor-pointer">
                       <input
@@ -513,17 +564,23 @@ const TeamManagement = () => {
                             {user.name.charAt(0)}
                           </span>
                         </div>
-                        <div>
-                          <p className="text-sm font-medium text-gray-900 dark:text-white">
-                            {user.name}
-                          </p>
-                          <p className="text-xs text-gray-500 dark:text-gray-400">
-                            {user.email} • {user.department}
-                          </p>
-                        </div>
+                        <p className="text-sm font-medium text-gray-900 dark:text-white">
+                          {user.name}
+                        </p>
                       </div>
                     </label>
                   ))}
+                {pickerLoading ? (
+                  <p className="text-sm text-center text-gray-500 dark:text-gray-400 py-2">Loading...</p>
+                ) : pickerCursor && (
+                  <button
+                    type="button"
+                    onClick={() => fetchPickerPage(addMemberQuery, pickerCursor)}
+                    className="w-full py-2 text-sm text-blue-600 dark:text-blue-400 hover:text-blue-700 dark:hover:text-blue-300"
+                  >
+                    Load more
+                  </button>
+                )}
               </div>
             </div>
             <div className="flex justify-end space-x-3 mt-4">
@@ -531,6 +588,7 @@ const TeamManagement = () => {
                 onClick={() => {
                   setShowAddMembers(false);
                   setSelectedMembers([]);
+                  setAddMemberQuery('');
                 }}
                 className="px-4 py-2 text-gray-600 dark:text-gray-400 hover:text-gray-800 dark:hover:text-gray-200"
               >